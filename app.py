@@ -4,10 +4,12 @@ import re
 import io
 import PyPDF2
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from bs4 import BeautifulSoup, SoupStrainer
 from readability import Document
 import trafilatura
-from urllib.parse import urljoin
+from urllib.parse import urljoin, urlparse
 import os
 from pathlib import Path
 import base64
@@ -15,11 +17,40 @@ import json
 import csv
 import sqlite3
 import traceback
+import hashlib
+import threading
+import collections
+import uuid
+import random
+import types
+import sys
+import functools
+from email.utils import parsedate_to_datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED, TimeoutError as FuturesTimeoutError
 from fpdf import FPDF as PDF
 from typing import Optional
 
 # OpenAI client
-from openai import OpenAI
+from openai import OpenAI, APIConnectionError, APITimeoutError
+
+# Streamlit script-context helpers (used to let worker threads call st.* APIs)
+try:
+    from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+except ImportError:
+    add_script_run_ctx = None
+    get_script_run_ctx = None
+
+# Conditional import for tiktoken (exact token counts; falls back to a characters-per-token estimate)
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# Conditional import for lxml (fast anchor parsing for the HTML scrapers; falls back to a SoupStrainer)
+try:
+    from lxml import html as lxml_html
+except ImportError:
+    lxml_html = None
 
 # Conditional import for python-docx
 try:
@@ -45,6 +76,26 @@ OPPORTUNITY_SHEET_ID = "1QkJxZ-_mep-vgNLSfHhLr6ngKOi02Tj5QLD3FBqStzE"
 OPPORTUNITY_SHEET_GID = "1096084732"
 # India Science & Technology latest updates (additional source)
 INDIA_SCI_TECH_LATEST_URL = "https://www.indiascienceandtechnology.gov.in/latest-updates"
+# Browser-like User-Agent sent by every scraper (some portals reject the default python-requests agent)
+UA_HEADERS = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) GrantFinder/1.0"}
+# Scraper connection pooling and transient-error retries
+HTTP_POOL_HOSTS = int(os.getenv("HTTP_POOL_HOSTS", "16"))  # Hosts with a kept-alive connection pool
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "8"))  # Open connections kept per host
+HTTP_RETRY_TOTAL = int(os.getenv("HTTP_RETRY_TOTAL", "3"))
+HTTP_RETRY_BACKOFF = float(os.getenv("HTTP_RETRY_BACKOFF", "0.5"))  # Sleeps 0.5s, 1s, 2s between retries
+# On-disk HTTP cache: bodies + ETag/Last-Modified validators, revalidated with conditional GETs
+HTTP_CACHE_DIR = BASE_DIR / "http_cache"
+HTTP_CACHE_DISABLED = os.getenv("HTTP_CACHE_DISABLED", "").strip().lower() in ("1", "true", "yes")
+HTTP_PARSE_CACHE_VERSION = 2  # Bump when a scraper's parsing changes so memoized parse results are ignored
+HTTP_CACHE_MAX_BYTES = int(os.getenv("HTTP_CACHE_MAX_MB", "256")) * 1024 * 1024  # Least recently used URLs evicted beyond this
+HTTP_CACHE_MAX_AGE_SECONDS = int(os.getenv("HTTP_CACHE_MAX_AGE_SECONDS", str(30 * 24 * 3600)))  # Unused this long -> evicted
+HTTP_CACHE_PRUNE_INTERVAL_SECONDS = 300
+# Call PDFs are often 5-20 MB scans; the head is downloaded first (Range request where the server honours it),
+# then the tail (where PyPDF2 finds the xref/trailer), and the whole file only if those two don't parse
+PAGE_FETCH_MAX_BYTES = int(os.getenv("PAGE_FETCH_MAX_BYTES", str(4 * 1024 * 1024)))
+PDF_TAIL_BYTES = int(os.getenv("PDF_TAIL_BYTES", str(1024 * 1024)))
+PDF_FULL_MAX_BYTES = int(os.getenv("PDF_FULL_MAX_BYTES", str(32 * 1024 * 1024)))
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "10"))
 # Fallback taxonomy used if taxonomy.json is missing in deployment
 DEFAULT_TAXONOMY = {
     "Sustainable Development and Ecology": [
@@ -235,87 +286,1321 @@ DEFAULT_TAXONOMY = {
 # OpenAI API Key
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 SELECTED_MODEL = "gpt-4o-mini"
+# Model for cheap, mechanical tasks (summaries, section extraction); e.g. LLM_FAST_MODEL=gpt-4.1-nano
+LLM_FAST_MODEL = os.getenv("LLM_FAST_MODEL", SELECTED_MODEL)
+
+# Generation settings per task. Each field can be overridden with LLM_TASK_<TASK>_<FIELD>,
+# e.g. LLM_TASK_ALIGNMENT_MODEL=gpt-4o or LLM_TASK_SUMMARIZE_MAX_TOKENS=600.
+LLM_TASK_PROFILES = {
+    "summarize": {"model": LLM_FAST_MODEL, "max_tokens": 1000, "temperature": 0.2},
+    "template_extract": {"model": LLM_FAST_MODEL, "max_tokens": 800, "temperature": 0.0},
+    "alignment": {"model": SELECTED_MODEL, "max_tokens": 1500, "temperature": 0.3},
+    "brainstorm_report": {"model": SELECTED_MODEL, "max_tokens": 4096, "temperature": 0.4},
+    "brainstorm_section": {"model": SELECTED_MODEL, "max_tokens": 900, "temperature": 0.4},
+    "improve_section": {"model": SELECTED_MODEL, "max_tokens": 3000, "temperature": 0.5},
+    "draft": {"model": SELECTED_MODEL, "max_tokens": 4096, "temperature": 0.7},
+    "opportunity_ideas": {"model": LLM_FAST_MODEL, "max_tokens": 1200, "temperature": 0.8},
+}
+
+def get_task_profile(task):
+    """
+    Resolved {"model", "max_tokens", "temperature"} for a task in LLM_TASK_PROFILES, with env overrides applied.
+    """
+    profile = dict(LLM_TASK_PROFILES[task])
+    for field, default in profile.items():
+        override = os.getenv(f"LLM_TASK_{task.upper()}_{field.upper()}")
+        if override:
+            profile[field] = override if isinstance(default, str) else type(default)(float(override))
+    return profile
+
+# LLM backend: "openai" (default), "mock" (offline, deterministic), "record" (OpenAI, saving responses) or "replay" (saved responses only)
+LLM_BACKEND = os.getenv("LLM_BACKEND", "openai").lower()
 
 # Initialize OpenAI client (graceful if key missing)
 if OPENAI_API_KEY:
-    openai_client = OpenAI(api_key=OPENAI_API_KEY)
+    # Retries (429s and transient errors alike) are owned by generate_content_with_retry so they go through the shared rate limiter
+    openai_client = OpenAI(api_key=OPENAI_API_KEY, max_retries=0)
 else:
     openai_client = None
-    st.error("OPENAI_API_KEY is not set. Please set it in your environment or Streamlit Secrets.")
+    if LLM_BACKEND in ("openai", "record"):
+        st.error("OPENAI_API_KEY is not set. Please set it in your environment or Streamlit Secrets.")
+
+# --- LLM Backends ---
+# Every backend exposes create(model, messages, max_tokens, stream=False, attempt=0, **kwargs) and returns an object with
+# .headers and .parse(), mirroring openai_client.chat.completions.with_raw_response.create.
+# attempt is the caller's retry index for this request (hedges add a suffix); only the mock uses it.
+LLM_RECORDINGS_FILE = Path(os.getenv("LLM_RECORDINGS_FILE", str(BASE_DIR / "llm_recordings.jsonl")))
+
+# Mock latency model: first token after latency_s (+/- jitter_s), then tokens_per_second (0 = instant).
+# Any field can be overridden with LLM_MOCK_<FIELD>, e.g. LLM_MOCK_ERROR_RATE=0.1.
+LLM_MOCK_PROFILES = {
+    "instant": {"latency_s": 0.0, "jitter_s": 0.0, "tokens_per_second": 0, "error_rate": 0.0, "completion_tokens": 200},
+    "typical": {"latency_s": 0.6, "jitter_s": 0.3, "tokens_per_second": 80, "error_rate": 0.0, "completion_tokens": 400},
+    "slow": {"latency_s": 2.0, "jitter_s": 1.0, "tokens_per_second": 25, "error_rate": 0.0, "completion_tokens": 600},
+    "flaky": {"latency_s": 0.6, "jitter_s": 0.3, "tokens_per_second": 80, "error_rate": 0.2, "completion_tokens": 400},
+}
+LLM_MOCK_PROFILE = os.getenv("LLM_MOCK_PROFILE", "typical")
+LLM_MOCK_VOCABULARY = (
+    "research proposal funding impact method data analysis objective outcome evaluation partner "
+    "innovation timeline budget risk mitigation novelty evidence community policy capacity"
+).split()
+
+class _RawLLMResponse:
+    def __init__(self, parsed, headers=None):
+        self.headers = headers or {}
+        self._parsed = parsed
+
+    def parse(self):
+        return self._parsed
+
+def _usage(prompt_tokens, completion_tokens):
+    return types.SimpleNamespace(
+        prompt_tokens=prompt_tokens,
+        completion_tokens=completion_tokens,
+        total_tokens=prompt_tokens + completion_tokens,
+    )
+
+def _completion_object(text, usage):
+    return types.SimpleNamespace(
+        choices=[types.SimpleNamespace(message=types.SimpleNamespace(content=text), finish_reason="stop")],
+        usage=usage,
+    )
+
+def _completion_chunks(pieces, usage, delay_per_piece=0.0):
+    # Same shape as an OpenAI stream with include_usage: content chunks, then one usage-only chunk
+    for piece in pieces:
+        if delay_per_piece:
+            time.sleep(delay_per_piece)
+        yield types.SimpleNamespace(choices=[types.SimpleNamespace(delta=types.SimpleNamespace(content=piece))], usage=None)
+    yield types.SimpleNamespace(choices=[], usage=usage)
+
+def _llm_request_key(model, messages, max_tokens):
+    payload = json.dumps({"model": model, "messages": messages, "max_tokens": max_tokens}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class MockLLMError(Exception):
+    """
+    Simulated provider error; looks like an openai.RateLimitError to _should_retry_generation_error.
+    """
+    def __init__(self, message, status_code=429, retry_after=1):
+        super().__init__(message)
+        self.status_code = status_code
+        self.response = types.SimpleNamespace(headers={"retry-after": str(retry_after)})
+
+class OpenAIChatBackend:
+    name = "openai"
+
+    def __init__(self, client):
+        self.client = client
+
+    def create(self, model, messages, max_tokens, stream=False, attempt=0, **kwargs):
+        if self.client is None:
+            raise RuntimeError("OPENAI_API_KEY is missing. Set it and restart the app to use AI features.")
+        return self.client.chat.completions.with_raw_response.create(
+            model=model, messages=messages, max_tokens=max_tokens, stream=stream, **kwargs
+        )
+
+class MockLLMBackend:
+    """
+    Offline, deterministic stand-in for the OpenAI API.
+    The same request always produces the same text and token counts; latency and errors are drawn per
+    (request, attempt) from the caller's retry index, so a retried request can succeed exactly as it would
+    against a flaky provider, and a repeated benchmark run sees the same errors.
+    """
+    name = "mock"
+
+    def __init__(self, profile):
+        self.profile = profile
+
+    def create(self, model, messages, max_tokens, stream=False, attempt=0, **kwargs):
+        key = _llm_request_key(model, messages, max_tokens)
+        rng = random.Random(f"{key}:{attempt}")
+
+        latency = max(0.0, self.profile["latency_s"] + rng.uniform(-1, 1) * self.profile["jitter_s"])
+        time.sleep(latency)
+        if rng.random() < self.profile["error_rate"]:
+            raise MockLLMError("Mock rate limit reached (simulated 429)")
+
+        text_rng = random.Random(key)
+        target = max(1, min(max_tokens, int(self.profile["completion_tokens"] * text_rng.uniform(0.5, 1.0))))
+        pieces = [text_rng.choice(LLM_MOCK_VOCABULARY) + " " for _ in range(target)]
+        prompt_text = "\n".join(m.get("content", "") for m in messages)
+        usage = _usage(count_tokens(prompt_text, model), target)
+        tokens_per_second = self.profile["tokens_per_second"]
+        delay_per_piece = 1.0 / tokens_per_second if tokens_per_second else 0.0
+
+        if stream:
+            return _RawLLMResponse(_completion_chunks(pieces, usage, delay_per_piece))
+        time.sleep(delay_per_piece * len(pieces))
+        return _RawLLMResponse(_completion_object("".join(pieces).strip(), usage))
+
+class RecordReplayLLMBackend:
+    """
+    "record" forwards to another backend and appends every successful response to LLM_RECORDINGS_FILE;
+    "replay" answers only from that file (no network) and fails on requests that were never recorded.
+    """
+    def __init__(self, path, inner=None):
+        self.path = Path(path)
+        self.inner = inner
+        self.name = "record" if inner is not None else "replay"
+        self._lock = threading.Lock()
+        self._recordings = {}
+        if self.path.exists():
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._recordings[entry["key"]] = entry
+
+    def _save(self, key, model, text, usage):
+        entry = {
+            "key": key,
+            "model": model,
+            "text": text,
+            "prompt_tokens": getattr(usage, "prompt_tokens", 0) or 0,
+            "completion_tokens": getattr(usage, "completion_tokens", 0) or 0,
+        }
+        with self._lock:
+            self._recordings[key] = entry
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+
+    def _recording_stream(self, key, model, stream):
+        parts = []
+        usage = None
+        for chunk in stream:
+            if getattr(chunk, "usage", None):
+                usage = chunk.usage
+            if chunk.choices and chunk.choices[0].delta.content:
+                parts.append(chunk.choices[0].delta.content)
+            yield chunk
+        self._save(key, model, "".join(parts), usage)
+
+    def create(self, model, messages, max_tokens, stream=False, attempt=0, **kwargs):
+        key = _llm_request_key(model, messages, max_tokens)
+        if self.inner is None:
+            entry = self._recordings.get(key)
+            if entry is None:
+                raise KeyError(f"No recorded response for this request in {self.path.name}")
+            usage = _usage(entry["prompt_tokens"], entry["completion_tokens"])
+            if stream:
+                return _RawLLMResponse(_completion_chunks(re.findall(r"\S+\s*", entry["text"]), usage))
+            return _RawLLMResponse(_completion_object(entry["text"], usage))
+
+        raw = self.inner.create(model, messages, max_tokens, stream=stream, attempt=attempt, **kwargs)
+        if stream:
+            return _RawLLMResponse(self._recording_stream(key, model, raw.parse()), raw.headers)
+        response = raw.parse()
+        self._save(key, model, response.choices[0].message.content, getattr(response, "usage", None))
+        return raw
+
+def _mock_profile(name):
+    profile = dict(LLM_MOCK_PROFILES.get(name, LLM_MOCK_PROFILES["typical"]))
+    for field, default in profile.items():
+        override = os.getenv(f"LLM_MOCK_{field.upper()}")
+        if override:
+            profile[field] = type(default)(float(override))
+    return profile
+
+@st.cache_resource
+def get_llm_backend():
+    if LLM_BACKEND == "mock":
+        return MockLLMBackend(_mock_profile(LLM_MOCK_PROFILE))
+    if LLM_BACKEND == "replay":
+        return RecordReplayLLMBackend(LLM_RECORDINGS_FILE)
+    if LLM_BACKEND == "record":
+        return RecordReplayLLMBackend(LLM_RECORDINGS_FILE, inner=OpenAIChatBackend(openai_client))
+    return OpenAIChatBackend(openai_client)
+
+def llm_backend_available():
+    return LLM_BACKEND in ("mock", "replay") or openai_client is not None
 
 # --- Rate Limiting ---
-LAST_API_CALL_TIME = 0
-MIN_SECONDS_BETWEEN_CALLS = 1  # OpenAI has generous rate limits
+# Account limits for SELECTED_MODEL; set these to your OpenAI tier
+LLM_REQUESTS_PER_MINUTE = int(os.getenv("LLM_REQUESTS_PER_MINUTE", "500"))
+LLM_TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", "200000"))
+
+def _parse_rate_limit_duration(value) -> Optional[float]:
+    """
+    Parse OpenAI reset durations ("1s", "6m0s", "20ms") or Retry-After values (seconds or HTTP date) into seconds.
+    """
+    if value is None:
+        return None
+    value = str(value).strip()
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    parts = re.findall(r"(\d+(?:\.\d+)?)(ms|h|m|s)", value)
+    if parts:
+        scale = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+        return sum(float(num) * scale[unit] for num, unit in parts)
+    try:
+        retry_at = parsedate_to_datetime(value)
+        return max(0.0, (retry_at - datetime.now(retry_at.tzinfo)).total_seconds())
+    except Exception:
+        return None
+
+class TokenBucketRateLimiter:
+    """
+    Thread-safe limiter shared by every session in the server process.
+    Two buckets (requests/minute and tokens/minute) refill continuously. Callers queue strictly
+    first-in-first-out on a condition variable, so a large request cannot be starved by small ones.
+    Provider feedback (Retry-After and x-ratelimit-* headers) pauses or drains the buckets for everyone.
+    """
+
+    def __init__(self, requests_per_minute, tokens_per_minute):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.available_requests = float(requests_per_minute)
+        self.available_tokens = float(tokens_per_minute)
+        self.blocked_until = 0.0
+        self._updated_at = time.monotonic()
+        self._cond = threading.Condition()
+        self._queue = collections.deque()
+
+    def _refill(self, now):
+        elapsed = now - self._updated_at
+        self._updated_at = now
+        self.available_requests = min(self.requests_per_minute, self.available_requests + elapsed * self.requests_per_minute / 60.0)
+        self.available_tokens = min(self.tokens_per_minute, self.available_tokens + elapsed * self.tokens_per_minute / 60.0)
+
+    def _seconds_until_ready(self, cost, now):
+        waits = [self.blocked_until - now]
+        if self.available_requests < 1:
+            waits.append((1 - self.available_requests) * 60.0 / self.requests_per_minute)
+        if self.available_tokens < cost:
+            waits.append((cost - self.available_tokens) * 60.0 / self.tokens_per_minute)
+        return max(0.01, max(waits))
+
+    def acquire(self, estimated_tokens):
+        """
+        Block until this caller is at the head of the queue and both buckets can cover the request.
+        """
+        # A single request larger than the per-minute budget must still be admissible eventually
+        cost = min(max(1, int(estimated_tokens)), self.tokens_per_minute)
+        ticket = object()
+        with self._cond:
+            self._queue.append(ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    if self._queue[0] is ticket:
+                        if now >= self.blocked_until and self.available_requests >= 1 and self.available_tokens >= cost:
+                            self.available_requests -= 1
+                            self.available_tokens -= cost
+                            return
+                        self._cond.wait(self._seconds_until_ready(cost, now))
+                    else:
+                        self._cond.wait()
+            finally:
+                self._queue.remove(ticket)
+                self._cond.notify_all()
+
+    def pause(self, seconds):
+        with self._cond:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + max(0.0, seconds))
+            self._cond.notify_all()
+
+    def apply_provider_headers(self, headers) -> Optional[float]:
+        """
+        Sync the buckets with the provider's view of our quota. Returns the Retry-After delay (seconds), if any.
+        """
+        if not headers:
+            return None
+        retry_after = None
+        if headers.get("retry-after-ms"):
+            retry_after = _parse_rate_limit_duration(headers.get("retry-after-ms"))
+            retry_after = retry_after / 1000.0 if retry_after is not None else None
+        if retry_after is None:
+            retry_after = _parse_rate_limit_duration(headers.get("retry-after"))
+
+        with self._cond:
+            now = time.monotonic()
+            self._refill(now)
+            for remaining_header, reset_header, attr in (
+                ("x-ratelimit-remaining-requests", "x-ratelimit-reset-requests", "available_requests"),
+                ("x-ratelimit-remaining-tokens", "x-ratelimit-reset-tokens", "available_tokens"),
+            ):
+                try:
+                    remaining = float(headers.get(remaining_header))
+                except (TypeError, ValueError):
+                    continue
+                setattr(self, attr, min(getattr(self, attr), remaining))
+                if remaining <= 0:
+                    reset = _parse_rate_limit_duration(headers.get(reset_header))
+                    if reset:
+                        self.blocked_until = max(self.blocked_until, now + reset)
+            if retry_after:
+                self.blocked_until = max(self.blocked_until, now + retry_after)
+            self._cond.notify_all()
+        return retry_after
+
+@st.cache_resource
+def get_rate_limiter():
+    return TokenBucketRateLimiter(LLM_REQUESTS_PER_MINUTE, LLM_TOKENS_PER_MINUTE)
 
 # --- Response wrapper to maintain compatibility ---
 class AIResponse:
-    def __init__(self, text):
+    def __init__(self, text, cached=False, finish_reason=None, prompt_tokens=0, cached_prompt_tokens=0):
         self.text = text
+        self.cached = cached
+        self.finish_reason = finish_reason  # "length" when the reply was cut off at max_tokens
+        # Usage of the upstream call that produced this response (0 for cache hits and coalesced duplicates)
+        self.prompt_tokens = prompt_tokens
+        self.cached_prompt_tokens = cached_prompt_tokens
+
+# --- Persistent LLM Response Cache ---
+# Responses are stored in the llm_response_cache table of proposals.db, keyed on (model, prompt hash, max_tokens).
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "2000"))
+LLM_CACHE_DISABLED = os.getenv("LLM_CACHE_DISABLED", "").strip().lower() in ("1", "true", "yes")
 
-# --- AI Helper Functions ---
-def generate_content_with_retry(model_name, prompt, max_retries=5, delay=5):
-    global LAST_API_CALL_TIME
-    if openai_client is None:
-        st.error("OPENAI_API_KEY is missing. Set it and restart the app to use AI features.")
+@st.cache_resource
+def get_llm_cache_stats():
+    """
+    Process-wide hit/miss counters, shared by every session and kept across reruns.
+    """
+    return {"hits": 0, "misses": 0, "lock": threading.Lock()}
+
+def _record_llm_cache_lookup(hit: bool):
+    stats = get_llm_cache_stats()
+    with stats["lock"]:
+        stats["hits" if hit else "misses"] += 1
+
+def _llm_cache_key(model_name, prompt, max_tokens):
+    prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+    cache_key = hashlib.sha256(f"{model_name}|{prompt_hash}|{max_tokens}".encode("utf-8")).hexdigest()
+    return cache_key, prompt_hash
+
+def llm_cache_get(model_name, prompt, max_tokens, allow_stale=False) -> Optional[str]:
+    """
+    Return a cached response text, or None on miss/expiry. Touches last_accessed for LRU eviction.
+    allow_stale returns expired rows too (used to serve degraded output while the circuit breaker is open).
+    """
+    cache_key, _ = _llm_cache_key(model_name, prompt, max_tokens)
+    now = time.time()
+    try:
+        with sqlite3.connect(DATABASE_FILE) as conn:
+            row = conn.execute(
+                "SELECT response_text, created_at FROM llm_response_cache WHERE cache_key = ?",
+                (cache_key,),
+            ).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > LLM_CACHE_TTL_SECONDS and not allow_stale:
+                conn.execute("DELETE FROM llm_response_cache WHERE cache_key = ?", (cache_key,))
+                return None
+            conn.execute(
+                "UPDATE llm_response_cache SET last_accessed = ?, hit_count = hit_count + 1 WHERE cache_key = ?",
+                (now, cache_key),
+            )
+            return row[0]
+    except sqlite3.Error:
+        traceback.print_exc()
         return None
-    
-    # Throttle: ensure minimum time between API calls
-    current_time = time.time()
-    time_since_last_call = current_time - LAST_API_CALL_TIME
-    if time_since_last_call < MIN_SECONDS_BETWEEN_CALLS:
-        wait_needed = MIN_SECONDS_BETWEEN_CALLS - time_since_last_call
-        time.sleep(wait_needed)
-    
-    for i in range(max_retries):
-        try:
-            LAST_API_CALL_TIME = time.time()
-            response = openai_client.chat.completions.create(
-                model=model_name,
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=4096
+
+def llm_cache_put(model_name, prompt, max_tokens, response_text):
+    """
+    Store a response, then drop expired rows and evict least-recently-used rows beyond LLM_CACHE_MAX_ENTRIES.
+    """
+    cache_key, prompt_hash = _llm_cache_key(model_name, prompt, max_tokens)
+    now = time.time()
+    try:
+        with sqlite3.connect(DATABASE_FILE) as conn:
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO llm_response_cache
+                    (cache_key, model, prompt_hash, max_tokens, response_text, created_at, last_accessed, hit_count)
+                VALUES (?, ?, ?, ?, ?, ?, ?, 0)
+                """,
+                (cache_key, model_name, prompt_hash, max_tokens, response_text, now, now),
+            )
+            conn.execute("DELETE FROM llm_response_cache WHERE created_at < ?", (now - LLM_CACHE_TTL_SECONDS,))
+            conn.execute(
+                """
+                DELETE FROM llm_response_cache WHERE cache_key IN (
+                    SELECT cache_key FROM llm_response_cache ORDER BY last_accessed DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (LLM_CACHE_MAX_ENTRIES,),
             )
-            return AIResponse(response.choices[0].message.content)
+    except sqlite3.Error:
+        traceback.print_exc()
+
+def clear_llm_cache():
+    with sqlite3.connect(DATABASE_FILE) as conn:
+        conn.execute("DELETE FROM llm_response_cache")
+
+# --- AI Helper Functions ---
+def _resolve_use_cache(use_cache):
+    # Bypass: per call (use_cache=False), per session (sidebar toggle), or globally (LLM_CACHE_DISABLED)
+    return use_cache and not LLM_CACHE_DISABLED and not st.session_state.get("llm_cache_bypass", False)
+
+def _acquire_rate_limit(model_name, prompt, max_tokens):
+    # OpenAI counts prompt tokens plus the max_tokens reservation against the TPM limit
+    get_rate_limiter().acquire(count_tokens(prompt, model_name) + max_tokens)
+
+def _is_rate_limit_error(e):
+    error_str = str(e).lower()
+    return getattr(e, "status_code", None) == 429 or "rate" in error_str or "limit" in error_str or "quota" in error_str
+
+def _is_transient_error(e):
+    # What the OpenAI SDK's own retries covered: dropped connections, timeouts, 408/409 and 5xx
+    status = getattr(e, "status_code", None)
+    return isinstance(e, (APIConnectionError, APITimeoutError)) or status in (408, 409) or (isinstance(status, int) and status >= 500)
+
+def _should_retry_generation_error(e, attempt, max_retries, delay):
+    """
+    Report a failed attempt; returns True if the caller should retry, False to give up.
+    Rate-limit errors pause the shared limiter (honouring Retry-After) instead of sleeping this caller;
+    transient errors back off this caller only, and the retry goes through the limiter again.
+    """
+    headers = getattr(getattr(e, "response", None), "headers", None)
+    retry_after = get_rate_limiter().apply_provider_headers(headers)
+    if _is_rate_limit_error(e):
+        if attempt < max_retries - 1:
+            wait_time = retry_after if retry_after is not None else delay * (2 ** attempt)
+            get_rate_limiter().pause(wait_time)
+            st.warning(f"Rate limit hit. Retrying in about {wait_time:.0f} seconds (attempt {attempt+2}/{max_retries})...")
+            return True
+        st.error("API rate limit exceeded. Please try again in a few minutes.")
+        return False
+    if _is_transient_error(e):
+        if attempt < max_retries - 1:
+            wait_time = retry_after if retry_after is not None else delay * (2 ** attempt)
+            st.warning(f"Temporary API error ({e}). Retrying in about {wait_time:.0f} seconds (attempt {attempt+2}/{max_retries})...")
+            time.sleep(wait_time)
+            return True
+        st.error(f"The API is not responding. Please try again in a few minutes. ({e})")
+        return False
+    st.error(f"An unexpected error occurred during content generation: {e}")
+    traceback.print_exc()
+    return False
+
+# --- Single-Flight Request Coalescing ---
+class _InFlightCall:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls with the same key: the first caller runs fn, later callers block until it
+    finishes and receive the same result. Nothing is remembered once the call completes.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        """
+        Returns (result, coalesced); coalesced is True when the result came from another caller's fn.
+        If the leading fn raises, the exception propagates to the leader and waiters receive None.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _InFlightCall()
+                self._calls[key] = call
+        if not leader:
+            call.done.wait()
+            return call.result, True
+        try:
+            call.result = fn()
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+        return call.result, False
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
+
+@st.cache_resource
+def get_llm_single_flight():
+    # One registry per process so identical requests from different sessions coalesce
+    return SingleFlight()
+
+# --- Hedged Requests ---
+# A non-streaming call still running after the p95 latency of recent calls for the same (model, feature)
+# gets a second, identical request; whichever finishes first wins and the other is discarded.
+LLM_HEDGE_ENABLED = os.getenv("LLM_HEDGE_ENABLED", "1").strip().lower() in ("1", "true", "yes")
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))  # No hedging until the percentile is meaningful
+LLM_HEDGE_MIN_DELAY_SECONDS = float(os.getenv("LLM_HEDGE_MIN_DELAY_SECONDS", "1.0"))
+LLM_LATENCY_WINDOW = 200  # Recent latencies kept per (model, feature)
+
+class LatencyTracker:
+    def __init__(self, window=LLM_LATENCY_WINDOW):
+        self._samples = collections.defaultdict(lambda: collections.deque(maxlen=window))
+        self._lock = threading.Lock()
+
+    def record(self, key, latency_s):
+        with self._lock:
+            self._samples[key].append(latency_s)
+
+    def percentile(self, key, pct, min_samples=1) -> Optional[float]:
+        with self._lock:
+            samples = list(self._samples.get(key, ()))
+        if len(samples) < min_samples:
+            return None
+        return _percentile(samples, pct)
+
+    def hedge_delay(self, key) -> Optional[float]:
+        """
+        Seconds to wait before hedging a call for key, or None if there are too few samples to hedge.
+        """
+        p = self.percentile(key, LLM_HEDGE_PERCENTILE, min_samples=LLM_HEDGE_MIN_SAMPLES)
+        return None if p is None else max(LLM_HEDGE_MIN_DELAY_SECONDS, p)
+
+    def keys(self):
+        with self._lock:
+            return list(self._samples.keys())
+
+@st.cache_resource
+def get_llm_latency_tracker():
+    return LatencyTracker()
+
+@st.cache_resource
+def get_llm_hedge_executor():
+    # Separate from run_concurrently pools: a blocked primary must never keep its hedge from starting
+    return ThreadPoolExecutor(max_workers=32, thread_name_prefix="llm-hedge")
+
+def _hedged_create(model_name, prompt, max_tokens, feature, attempt=0, **create_kwargs):
+    """
+    Non-streaming upstream call with optional hedging. Returns (raw_response, parsed_response, hedged).
+    attempt is the caller's retry index, passed on to the backend.
+    """
+    tracker = get_llm_latency_tracker()
+    latency_key = (model_name, feature)
+    backend = get_llm_backend()
+
+    def _attempt(label=attempt):
+        attempt_started = time.time()
+        raw_response = backend.create(
+            model=model_name,
+            messages=[{"role": "user", "content": prompt}],
+            max_tokens=max_tokens,
+            attempt=label,
+            **create_kwargs
+        )
+        response = raw_response.parse()
+        tracker.record(latency_key, time.time() - attempt_started)
+        return raw_response, response
+
+    hedge_delay = tracker.hedge_delay(latency_key) if LLM_HEDGE_ENABLED else None
+    if hedge_delay is None:
+        return (*_attempt(), False)
+
+    executor = get_llm_hedge_executor()
+    primary = executor.submit(_attempt)
+    done, _ = wait([primary], timeout=hedge_delay)
+    if done:
+        return (*primary.result(), False)
+
+    # The hedge is a real request, so it goes through the rate limiter like any other
+    _acquire_rate_limit(model_name, prompt, max_tokens)
+    hedge_started = time.time()
+    hedge = executor.submit(_attempt, f"{attempt}:hedge")
+    submitted_at = {primary: hedge_started - hedge_delay, hedge: hedge_started}
+
+    def _record_discarded(future):
+        # The losing request is billed too; ledger it (hedge_discarded) once it finishes
+        if future.cancelled() or future.exception() is not None:
+            return
+        usage = getattr(future.result()[1], "usage", None)
+        record_llm_call(
+            feature,
+            model_name,
+            prompt_tokens=getattr(usage, "prompt_tokens", 0),
+            completion_tokens=getattr(usage, "completion_tokens", 0),
+            cached_prompt_tokens=_cached_prompt_tokens(usage),
+            latency_s=time.time() - submitted_at[future],
+            hedged=True,
+            hedge_discarded=True,
+        )
+
+    first_error = None
+    for future in as_completed([primary, hedge]):
+        try:
+            result = future.result()
         except Exception as e:
-            error_str = str(e).lower()
-            if "rate" in error_str or "limit" in error_str or "quota" in error_str:
-                if i < max_retries - 1:
-                    wait_time = delay * (2 ** i)
-                    st.warning(f"Rate limit hit. Waiting {wait_time} seconds before retry {i+2}/{max_retries}...")
-                    time.sleep(wait_time)
+            first_error = first_error or e
+            continue
+        (hedge if future is primary else primary).add_done_callback(_record_discarded)
+        return (*result, future is hedge)
+    raise first_error
+
+# --- Circuit Breaker ---
+# Once the recent upstream failure rate crosses the threshold, calls fail fast for LLM_BREAKER_OPEN_SECONDS
+# and are answered from the response cache (stale entries included) where possible. Rate-limit errors are
+# left to the rate limiter and do not count as failures.
+LLM_BREAKER_FAILURE_RATE = float(os.getenv("LLM_BREAKER_FAILURE_RATE", "0.5"))
+LLM_BREAKER_WINDOW = int(os.getenv("LLM_BREAKER_WINDOW", "20"))
+LLM_BREAKER_MIN_CALLS = int(os.getenv("LLM_BREAKER_MIN_CALLS", "5"))
+LLM_BREAKER_OPEN_SECONDS = float(os.getenv("LLM_BREAKER_OPEN_SECONDS", "30"))
+
+class CircuitBreaker:
+    """
+    closed -> open when the failure rate over the last `window` calls reaches failure_rate;
+    open -> half-open after open_seconds, letting one probe through; the probe's outcome closes or re-opens it.
+    """
+    def __init__(self, failure_rate=LLM_BREAKER_FAILURE_RATE, window=LLM_BREAKER_WINDOW, min_calls=LLM_BREAKER_MIN_CALLS, open_seconds=LLM_BREAKER_OPEN_SECONDS):
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self._results = collections.deque(maxlen=window)
+        self._opened_at = None
+        self._probe_started_at = None
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            now = time.monotonic()
+            if now - self._opened_at < self.open_seconds:
+                return False
+            # Half-open: one probe at a time (a probe that never reports back expires after open_seconds)
+            if self._probe_started_at is not None and now - self._probe_started_at < self.open_seconds:
+                return False
+            self._probe_started_at = now
+            return True
+
+    def record(self, success):
+        with self._lock:
+            if self._opened_at is not None:
+                if success:
+                    self._opened_at = None
+                    self._results.clear()
                 else:
-                    st.error("API rate limit exceeded. Please try again in a few minutes.")
+                    self._opened_at = time.monotonic()
+                self._probe_started_at = None
+                return
+            self._results.append(bool(success))
+            failures = sum(1 for ok in self._results if not ok)
+            if len(self._results) >= self.min_calls and failures / len(self._results) >= self.failure_rate:
+                self._opened_at = time.monotonic()
+
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            return "open" if time.monotonic() - self._opened_at < self.open_seconds else "half-open"
+
+    def retry_in(self):
+        with self._lock:
+            if self._opened_at is None:
+                return 0.0
+            return max(0.0, self.open_seconds - (time.monotonic() - self._opened_at))
+
+@st.cache_resource
+def get_llm_circuit_breaker():
+    return CircuitBreaker()
+
+# --- LLM Call Ledger ---
+# USD per 1M tokens (input, output), used for cost estimates in the Admin Console
+MODEL_PRICING_PER_MILLION = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4.1": (2.00, 8.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1-nano": (0.10, 0.40),
+}
+CACHED_INPUT_PRICE_FACTOR = 0.5  # Prompt-cache hits are billed at half the input price
+
+def record_llm_call(feature, model_name, prompt_tokens=0, completion_tokens=0, latency_s=0.0, retries=0, cache_hit=False, success=True, streamed=False, cached_prompt_tokens=0, coalesced=False, hedged=False, degraded=False, hedge_discarded=False):
+    try:
+        with sqlite3.connect(DATABASE_FILE) as conn:
+            conn.execute(
+                """
+                INSERT INTO llm_call_ledger
+                    (created_at, feature, model, prompt_tokens, cached_prompt_tokens, completion_tokens, latency_ms, retries, cache_hit, success, streamed, coalesced, hedged, degraded, hedge_discarded)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    time.time(),
+                    feature,
+                    model_name,
+                    int(prompt_tokens or 0),
+                    int(cached_prompt_tokens or 0),
+                    int(completion_tokens or 0),
+                    int(latency_s * 1000),
+                    retries,
+                    int(bool(cache_hit)),
+                    int(bool(success)),
+                    int(bool(streamed)),
+                    int(bool(coalesced)),
+                    int(bool(hedged)),
+                    int(bool(degraded)),
+                    int(bool(hedge_discarded)),
+                ),
+            )
+    except sqlite3.Error:
+        traceback.print_exc()
+
+def _cached_prompt_tokens(usage):
+    # Provider prompt-cache hits (prefix caching), reported under usage.prompt_tokens_details
+    return getattr(getattr(usage, "prompt_tokens_details", None), "cached_tokens", 0) or 0
+
+def _degraded_response(model_name, prompt, max_tokens, feature, started, placeholder=None):
+    """
+    Answer while the circuit breaker is open: the cached response (even if expired) or None, without calling upstream.
+    """
+    breaker = get_llm_circuit_breaker()
+    cached_text = llm_cache_get(model_name, prompt, max_tokens, allow_stale=True)
+    if cached_text is not None:
+        st.warning("The AI service is currently failing; showing a previously generated response.")
+        if placeholder is not None:
+            placeholder.markdown(cached_text)
+        record_llm_call(feature, model_name, latency_s=time.time() - started, cache_hit=True, degraded=True, streamed=placeholder is not None)
+        return AIResponse(cached_text, cached=True)
+    st.error(f"The AI service is currently failing. Please try again in about {breaker.retry_in():.0f} seconds.")
+    record_llm_call(feature, model_name, latency_s=time.time() - started, success=False, degraded=True, streamed=placeholder is not None)
+    return None
+
+def _resolve_feature(feature):
+    return feature or st.session_state.get('current_main_view') or "background"
+
+def _run_llm_request(model_name, prompt, max_tokens, attempt, feature=None, use_cache=True, max_retries=5, delay=5, placeholder=None):
+    """
+    Shared path of generate_content_with_retry and stream_content_with_retry: response cache, circuit breaker,
+    single-flight coalescing, retries and the call ledger. attempt(retry_index) makes one upstream call and returns
+    (text, finish_reason, usage, hedged). placeholder is set for streamed calls; cached, coalesced and
+    degraded text is rendered into it.
+    """
+    feature = _resolve_feature(feature)
+    streamed = placeholder is not None
+    started = time.time()
+    use_cache = _resolve_use_cache(use_cache)
+    if use_cache:
+        cached_text = llm_cache_get(model_name, prompt, max_tokens)
+        _record_llm_cache_lookup(cached_text is not None)
+        if cached_text is not None:
+            if streamed:
+                placeholder.markdown(cached_text)
+            record_llm_call(feature, model_name, latency_s=time.time() - started, cache_hit=True, streamed=streamed)
+            return AIResponse(cached_text, cached=True)
+
+    if not llm_backend_available():
+        st.error("OPENAI_API_KEY is missing. Set it and restart the app to use AI features.")
+        return None
+
+    breaker = get_llm_circuit_breaker()
+
+    def _call_upstream():
+        # Gated inside the single-flight leader, so a half-open probe is always the call that reports to the breaker
+        if not breaker.allow():
+            return _degraded_response(model_name, prompt, max_tokens, feature, started, placeholder=placeholder)
+        for i in range(max_retries):
+            try:
+                _acquire_rate_limit(model_name, prompt, max_tokens)
+                text, finish_reason, usage, hedged = attempt(i)
+                breaker.record(True)
+                record_llm_call(
+                    feature,
+                    model_name,
+                    prompt_tokens=getattr(usage, "prompt_tokens", 0),
+                    completion_tokens=getattr(usage, "completion_tokens", 0),
+                    cached_prompt_tokens=_cached_prompt_tokens(usage),
+                    latency_s=time.time() - started,
+                    retries=i,
+                    streamed=streamed,
+                    hedged=hedged,
+                )
+                # A reply cut off at max_tokens is not cached, so a hit never hides the truncation
+                if use_cache and text and finish_reason != "length":
+                    llm_cache_put(model_name, prompt, max_tokens, text)
+                return AIResponse(
+                    text,
+                    finish_reason=finish_reason,
+                    prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+                    cached_prompt_tokens=_cached_prompt_tokens(usage),
+                )
+            except Exception as e:
+                if streamed:
+                    placeholder.empty()
+                if not _is_rate_limit_error(e):
+                    breaker.record(False)
+                if not _should_retry_generation_error(e, i, max_retries, delay):
+                    record_llm_call(feature, model_name, latency_s=time.time() - started, retries=i, success=False, streamed=streamed)
                     return None
-            else:
-                st.error(f"An unexpected error occurred during content generation: {e}")
-                traceback.print_exc()
-                return None
+        record_llm_call(feature, model_name, latency_s=time.time() - started, retries=max_retries, success=False, streamed=streamed)
+        return None
+
+    response, coalesced = get_llm_single_flight().do(_llm_cache_key(model_name, prompt, max_tokens)[0], _call_upstream)
+    if coalesced:
+        record_llm_call(feature, model_name, latency_s=time.time() - started, coalesced=True, success=response is not None, streamed=streamed)
+        if response is not None:
+            if streamed:
+                # Another caller streamed this exact request; show its finished text
+                placeholder.markdown(response.text)
+            # The leader's usage belongs to the leader; this caller made no upstream call
+            response = AIResponse(response.text, finish_reason=response.finish_reason)
+    if streamed and response is not None and response.finish_reason == "length":
+        st.warning("The response reached its length limit and may be cut off, so it was not cached. Try generating it again or shortening the request.")
+    return response
+
+def generate_content_with_retry(model_name, prompt, max_retries=5, delay=5, max_tokens=4096, use_cache=True, feature=None, temperature=None):
+    """
+    feature: the view/feature name recorded in the LLM call ledger (defaults to the current view).
+    Prefer generate_for_task, which fills model, max_tokens and temperature from LLM_TASK_PROFILES.
+    """
+    create_kwargs = {} if temperature is None else {"temperature": temperature}
+    ledger_feature = _resolve_feature(feature)
+
+    def _attempt(retry_index):
+        raw_response, response, hedged = _hedged_create(model_name, prompt, max_tokens, ledger_feature, attempt=retry_index, **create_kwargs)
+        get_rate_limiter().apply_provider_headers(raw_response.headers)
+        choice = response.choices[0]
+        return choice.message.content, getattr(choice, "finish_reason", None), getattr(response, "usage", None), hedged
+
+    return _run_llm_request(
+        model_name, prompt, max_tokens, _attempt,
+        feature=ledger_feature, use_cache=use_cache, max_retries=max_retries, delay=delay,
+    )
 
-def summarize_text_for_prompt(text, max_length=2000, model_name=SELECTED_MODEL):
-    # Define a hard limit for the input to the summarization prompt itself
-    SUMMARIZATION_INPUT_HARD_LIMIT = 5000 # Characters - to prevent summarization prompt from being too long
+STREAM_RENDER_INTERVAL_SECONDS = 0.1  # Re-render the streamed text at most this often
 
-    if len(text) > max_length:
-        # Truncate text for the summarization prompt if it's extremely long
-        text_for_summarization = text[:SUMMARIZATION_INPUT_HARD_LIMIT]
-        
-        # Target summary length (e.g., 75% of max_length for the main prompt)
-        target_summary_length = int(max_length * 0.75)
+def stream_content_with_retry(model_name, prompt, placeholder=None, max_retries=5, delay=5, max_tokens=4096, use_cache=True, feature=None, temperature=None):
+    """
+    Streaming variant of generate_content_with_retry.
+    Renders tokens into `placeholder` (an st.empty() slot) as they arrive and returns the full text as an AIResponse.
+    Cache hits are rendered in one go. A stream that fails mid-way is retried from the start.
+    """
+    if placeholder is None:
+        placeholder = st.empty()
+
+    create_kwargs = {} if temperature is None else {"temperature": temperature}
+
+    def _attempt(retry_index):
+        raw_stream = get_llm_backend().create(
+            model=model_name,
+            messages=[{"role": "user", "content": prompt}],
+            max_tokens=max_tokens,
+            attempt=retry_index,
+            stream=True,
+            stream_options={"include_usage": True},
+            **create_kwargs
+        )
+        get_rate_limiter().apply_provider_headers(raw_stream.headers)
+        stream = raw_stream.parse()
+        parts = []
+        usage = None
+        finish_reason = None
+        last_render = 0.0
+        for chunk in stream:
+            # With include_usage, the final chunk carries usage and no choices
+            if getattr(chunk, "usage", None):
+                usage = chunk.usage
+            if not chunk.choices:
+                continue
+            # Set on the last content chunk only ("length" when cut off at max_tokens)
+            finish_reason = getattr(chunk.choices[0], "finish_reason", None) or finish_reason
+            delta = chunk.choices[0].delta.content
+            if not delta:
+                continue
+            parts.append(delta)
+            now = time.time()
+            if now - last_render >= STREAM_RENDER_INTERVAL_SECONDS:
+                placeholder.markdown("".join(parts) + " ▌")
+                last_render = now
+        text = "".join(parts)
+        placeholder.markdown(text)
+        return text, finish_reason, usage, False
+
+    return _run_llm_request(
+        model_name, prompt, max_tokens, _attempt,
+        feature=feature, use_cache=use_cache, max_retries=max_retries, delay=delay, placeholder=placeholder,
+    )
+
+def generate_for_task(task, prompt, **kwargs):
+    """
+    generate_content_with_retry with model, max_tokens and temperature from the task's profile.
+    Explicit keyword arguments win; the task name is the ledger feature unless one is given.
+    """
+    profile = get_task_profile(task)
+    kwargs.setdefault("max_tokens", profile["max_tokens"])
+    kwargs.setdefault("temperature", profile["temperature"])
+    kwargs.setdefault("feature", task)
+    return generate_content_with_retry(profile["model"], prompt, **kwargs)
+
+def stream_for_task(task, prompt, placeholder=None, **kwargs):
+    """
+    Streaming counterpart of generate_for_task.
+    """
+    profile = get_task_profile(task)
+    kwargs.setdefault("max_tokens", profile["max_tokens"])
+    kwargs.setdefault("temperature", profile["temperature"])
+    kwargs.setdefault("feature", task)
+    return stream_content_with_retry(profile["model"], prompt, placeholder=placeholder, **kwargs)
+
+def _percentile(values, pct):
+    """
+    Nearest-rank percentile of a list of numbers (None for an empty list).
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+def load_llm_ledger(since_ts=0.0):
+    with sqlite3.connect(DATABASE_FILE) as conn:
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM llm_call_ledger WHERE created_at >= ? ORDER BY created_at DESC", (since_ts,))
+        return [dict(row) for row in cursor.fetchall()]
+
+def summarize_llm_ledger(rows):
+    """
+    Aggregate ledger rows per feature: call counts, cache hit rate, p50/p95 latency, token spend and estimated cost.
+    Discarded hedge responses count toward tokens and cost only.
+    """
+    by_feature = {}
+    for row in rows:
+        by_feature.setdefault(row['feature'] or "unknown", []).append(row)
+
+    summary = []
+    for feature, billed_rows in sorted(by_feature.items()):
+        feature_rows = [r for r in billed_rows if not r.get('hedge_discarded')] or billed_rows
+        upstream = [r for r in feature_rows if not r['cache_hit'] and not r.get('coalesced') and not r.get('degraded') and not r.get('hedge_discarded')]
+        latencies = [r['latency_ms'] for r in upstream if r['success']]
+        prompt_tokens = sum(r['prompt_tokens'] or 0 for r in billed_rows)
+        cached_prompt_tokens = sum(r.get('cached_prompt_tokens') or 0 for r in billed_rows)
+        completion_tokens = sum(r['completion_tokens'] or 0 for r in billed_rows)
+        cost = 0.0
+        for r in billed_rows:
+            input_price, output_price = MODEL_PRICING_PER_MILLION.get(r['model'], (0.0, 0.0))
+            cached = r.get('cached_prompt_tokens') or 0
+            uncached = (r['prompt_tokens'] or 0) - cached
+            cost += (uncached * input_price + cached * input_price * CACHED_INPUT_PRICE_FACTOR + (r['completion_tokens'] or 0) * output_price) / 1_000_000
+        summary.append(
+            {
+                "feature": feature,
+                "calls": len(feature_rows),
+                "cache_hit_rate": round(sum(1 for r in feature_rows if r['cache_hit']) / len(feature_rows), 3),
+                "coalesced": sum(1 for r in feature_rows if r.get('coalesced')),
+                "hedged": sum(1 for r in feature_rows if r.get('hedged')),
+                "degraded": sum(1 for r in feature_rows if r.get('degraded')),
+                "errors": sum(1 for r in feature_rows if not r['success']),
+                "retries": sum(r['retries'] or 0 for r in feature_rows),
+                "p50_latency_ms": _percentile(latencies, 50),
+                "p95_latency_ms": _percentile(latencies, 95),
+                "prompt_tokens": prompt_tokens,
+                "cached_prompt_tokens": cached_prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "est_cost_usd": round(cost, 4),
+            }
+        )
+    return summary
+
+def format_prompt_cache_caption(responses):
+    """
+    Caption summarizing the provider prompt cache over the responses one run received (None entries are skipped).
+    """
+    responses = [r for r in responses if r is not None]
+    prompt_tokens = sum(r.prompt_tokens for r in responses)
+    cached_tokens = sum(r.cached_prompt_tokens for r in responses)
+    if not prompt_tokens:
+        return None
+    return f"Provider prompt cache: {cached_tokens:,} of {prompt_tokens:,} prompt tokens ({cached_tokens / prompt_tokens:.0%}) were served from the shared prefix cache."
+
+def _rows_to_csv(rows):
+    if not rows:
+        return ""
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=list(rows[0].keys()))
+    writer.writeheader()
+    writer.writerows(rows)
+    return buf.getvalue()
+
+# --- Token Budgeting ---
+# Context windows (tokens) for models this app may be pointed at
+MODEL_CONTEXT_WINDOWS = {
+    "gpt-4o-mini": 128_000,
+    "gpt-4o": 128_000,
+    "gpt-4.1": 1_047_576,
+    "gpt-4.1-mini": 1_047_576,
+    "gpt-4.1-nano": 1_047_576,
+    "gpt-3.5-turbo": 16_385,
+}
+DEFAULT_CONTEXT_WINDOW = 16_385
+# Ceiling on total prompt size even when the window is larger: long prompts cost latency and money
+PROMPT_TOKEN_BUDGET_CAP = int(os.getenv("PROMPT_TOKEN_BUDGET_CAP", "24000"))
+PROMPT_INSTRUCTION_RESERVE_TOKENS = 1000  # Headroom for the instruction text wrapped around the budgeted parts
+CHARS_PER_TOKEN_ESTIMATE = 4  # Used only when tiktoken is unavailable
+
+@st.cache_resource
+def _get_token_encoding(model_name: str):
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model_name)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        # e.g. BPE files cannot be downloaded in an offline deployment
+        traceback.print_exc()
+        return None
 
-        summary_prompt = f"""
-        Summarize the following text concisely, retaining all critical information for a research proposal context. The summary should be approximately {target_summary_length} characters long.
+def count_tokens(text, model_name=SELECTED_MODEL) -> int:
+    if not text:
+        return 0
+    encoding = _get_token_encoding(model_name)
+    if encoding is None:
+        return -(-len(text) // CHARS_PER_TOKEN_ESTIMATE)
+    return len(encoding.encode(text, disallowed_special=()))
+
+def truncate_to_tokens(text, max_tokens, model_name=SELECTED_MODEL) -> str:
+    """
+    Cut text to at most max_tokens, backing off to the last line/sentence boundary when one is close by.
+    """
+    if not text or count_tokens(text, model_name) <= max_tokens:
+        return text
+    encoding = _get_token_encoding(model_name)
+    if encoding is None:
+        cut = text[: max(0, max_tokens) * CHARS_PER_TOKEN_ESTIMATE]
+    else:
+        cut = encoding.decode(encoding.encode(text, disallowed_special=())[: max(0, max_tokens)])
+    boundary = max(cut.rfind("\n"), cut.rfind(". "))
+    if boundary > len(cut) * 0.8:
+        cut = cut[: boundary + 1]
+    return cut.rstrip()
+
+def prompt_token_budget(model_name=SELECTED_MODEL, fixed_text="", reserve_output_tokens=4096) -> int:
+    """
+    Tokens available for the variable parts of a prompt, after the output reservation,
+    the fixed text that is always sent verbatim, and instruction headroom.
+    """
+    window = MODEL_CONTEXT_WINDOWS.get(model_name, DEFAULT_CONTEXT_WINDOW)
+    total = min(window - reserve_output_tokens, PROMPT_TOKEN_BUDGET_CAP)
+    return max(0, total - count_tokens(fixed_text, model_name) - PROMPT_INSTRUCTION_RESERVE_TOKENS)
+
+def allocate_token_budget(part_tokens, total_budget):
+    """
+    Split total_budget across named prompt parts (max-min fair): parts smaller than an even share
+    keep their full size and the leftover is shared among the larger parts.
+    part_tokens: dict name -> token count. Returns dict name -> token allowance.
+    """
+    allocations = {}
+    remaining = dict(part_tokens)
+    budget = max(0, int(total_budget))
+    while remaining:
+        share = budget // len(remaining)
+        fitting = {name: tokens for name, tokens in remaining.items() if tokens <= share}
+        if not fitting:
+            for name in remaining:
+                allocations[name] = share
+            break
+        for name, tokens in fitting.items():
+            allocations[name] = tokens
+            budget -= tokens
+            del remaining[name]
+    return allocations
+
+def fit_prompt_parts(parts, fixed_text="", model_name=SELECTED_MODEL, reserve_output_tokens=4096):
+    """
+    Allocate the prompt budget across named parts (dict name -> text) and summarize only the parts
+    that exceed their allowance. Returns dict name -> text that fits.
+    """
+    budget = prompt_token_budget(model_name, fixed_text, reserve_output_tokens)
+    allocations = allocate_token_budget({name: count_tokens(text, model_name) for name, text in parts.items()}, budget)
+    names = list(parts)
+    fitted = run_concurrently(
+        lambda name: summarize_text_for_prompt(parts[name], max_tokens=allocations[name], model_name=model_name),
+        names,
+    )
+    return dict(zip(names, fitted))
+
+# --- Summarization (map-reduce over token-sized chunks) ---
+SUMMARY_CHUNK_TOKENS = 3000  # Map step input size
+CHUNK_SUMMARY_TOKENS = 400  # Map step output size; fixed so cached chunk summaries stay reusable
+SUMMARY_MAX_REDUCE_DEPTH = 3
+
+def _get_cached_summary(content_hash, max_tokens, model_name) -> Optional[str]:
+    try:
+        with sqlite3.connect(DATABASE_FILE) as conn:
+            row = conn.execute(
+                "SELECT summary FROM summary_cache WHERE content_hash = ? AND max_tokens = ? AND model = ?",
+                (content_hash, max_tokens, model_name),
+            ).fetchone()
+            return row[0] if row else None
+    except sqlite3.Error:
+        traceback.print_exc()
+        return None
+
+def _store_cached_summary(content_hash, max_tokens, model_name, summary):
+    try:
+        with sqlite3.connect(DATABASE_FILE) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO summary_cache (content_hash, max_tokens, model, summary, created_at) VALUES (?, ?, ?, ?, ?)",
+                (content_hash, max_tokens, model_name, summary, time.time()),
+            )
+    except sqlite3.Error:
+        traceback.print_exc()
+
+def _split_by_tokens(text, max_tokens, model_name=SELECTED_MODEL):
+    encoding = _get_token_encoding(model_name)
+    if encoding is None:
+        step = max_tokens * CHARS_PER_TOKEN_ESTIMATE
+        return [text[i : i + step] for i in range(0, len(text), step)]
+    tokens = encoding.encode(text, disallowed_special=())
+    return [encoding.decode(tokens[i : i + max_tokens]) for i in range(0, len(tokens), max_tokens)]
+
+def chunk_text_by_tokens(text, chunk_tokens=SUMMARY_CHUNK_TOKENS, model_name=SELECTED_MODEL):
+    """
+    Split text into chunks of at most chunk_tokens on paragraph boundaries.
+    Boundaries are content-defined: once a chunk is half full it closes after any paragraph whose hash
+    hits a marker, so an edit only reshapes the chunks around it and the rest keep their content hashes.
+    """
+    pieces = []
+    for paragraph in re.split(r"\n\s*\n", text):
+        if not paragraph.strip():
+            continue
+        if count_tokens(paragraph, model_name) > chunk_tokens:
+            pieces.extend(_split_by_tokens(paragraph, chunk_tokens, model_name))
+        else:
+            pieces.append(paragraph)
+
+    chunks, current, current_tokens = [], [], 0
+    for piece in pieces:
+        piece_tokens = count_tokens(piece, model_name)
+        if current and current_tokens + piece_tokens > chunk_tokens:
+            chunks.append("\n\n".join(current))
+            current, current_tokens = [], 0
+        current.append(piece)
+        current_tokens += piece_tokens
+        marker = int(hashlib.sha256(piece.encode("utf-8")).hexdigest()[:8], 16) % 4 == 0
+        if marker and current_tokens >= chunk_tokens // 2:
+            chunks.append("\n\n".join(current))
+            current, current_tokens = [], 0
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+def _summarize_once(text, target_tokens, model_name=SELECTED_MODEL) -> Optional[str]:
+    summary_prompt = f"""
+        Summarize the following text concisely, retaining all critical information for a research proposal context. The summary should be approximately {int(target_tokens * 0.75)} tokens (about {int(target_tokens * 0.55)} words) long.
 
         Text to Summarize:
-        {text_for_summarization}
+        {text}
         """
-        st.info("Summarizing lengthy input to fit AI context window...")
-        summary_response = generate_content_with_retry(model_name, summary_prompt)
-        if summary_response and summary_response.text:
-            # Ensure the summary itself doesn't exceed the intended max_length
-            return summary_response.text[:max_length]
-        else:
-            st.warning("Failed to summarize text. Using original (potentially truncated) text.")
-            return text[:max_length] # Fallback to truncation if summarization fails
-    return text
+    summary_response = generate_for_task("summarize", summary_prompt, max_tokens=max(target_tokens, 64))
+    if summary_response and summary_response.text:
+        return summary_response.text.strip()
+    return None
+
+def _summary_model():
+    # The model that actually writes summaries; summary_cache entries are keyed on it
+    return get_task_profile("summarize")["model"]
+
+def _summarize_chunk(chunk, model_name=SELECTED_MODEL) -> Optional[str]:
+    content_hash = hashlib.sha256(chunk.encode("utf-8")).hexdigest()
+    cached = _get_cached_summary(content_hash, CHUNK_SUMMARY_TOKENS, _summary_model())
+    if cached is not None:
+        return cached
+    summary = _summarize_once(chunk, CHUNK_SUMMARY_TOKENS, model_name)
+    if summary:
+        _store_cached_summary(content_hash, CHUNK_SUMMARY_TOKENS, _summary_model(), summary)
+    return summary
+
+def map_reduce_summarize(text, max_tokens, model_name=SELECTED_MODEL, depth=0) -> Optional[str]:
+    """
+    Summarize the whole text: chunk it, summarize the chunks concurrently (cached by content hash),
+    then reduce the partial summaries, recursing while they are still too long for one pass.
+    """
+    if count_tokens(text, model_name) <= SUMMARY_CHUNK_TOKENS or depth >= SUMMARY_MAX_REDUCE_DEPTH:
+        return _summarize_once(truncate_to_tokens(text, prompt_token_budget(model_name, reserve_output_tokens=max_tokens), model_name), max_tokens, model_name)
+
+    chunks = chunk_text_by_tokens(text, SUMMARY_CHUNK_TOKENS, model_name)
+    partials = run_concurrently(lambda chunk: _summarize_chunk(chunk, model_name), chunks)
+    # A failed chunk falls back to its truncated text so its content is not silently dropped
+    partials = [
+        partial or truncate_to_tokens(chunk, CHUNK_SUMMARY_TOKENS, model_name)
+        for chunk, partial in zip(chunks, partials)
+    ]
+    combined = "\n\n".join(partials)
+    if count_tokens(combined, model_name) <= max_tokens:
+        return combined
+    return map_reduce_summarize(combined, max_tokens, model_name, depth + 1)
+
+def summarize_text_for_prompt(text, max_tokens=1000, model_name=SELECTED_MODEL):
+    """
+    Return text unchanged if it fits in max_tokens; otherwise summarize the full text down to about that size.
+    model_name is the model the summary is budgeted for (token counting); summaries are memoized in
+    summary_cache by (text hash, max_tokens, summarizing model), shared by all sessions.
+    """
+    if not text or count_tokens(text, model_name) <= max_tokens:
+        return text
+
+    content_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    cached = _get_cached_summary(content_hash, max_tokens, _summary_model())
+    if cached is not None:
+        return cached
+
+    st.info("Summarizing lengthy input to fit AI context window...")
+    summary = map_reduce_summarize(text, max_tokens, model_name)
+    if summary:
+        # Ensure the summary itself doesn't exceed the allowance
+        summary = truncate_to_tokens(summary, max_tokens, model_name)
+        _store_cached_summary(content_hash, max_tokens, _summary_model(), summary)
+        return summary
+    st.warning("Failed to summarize text. Using original (truncated) text.")
+    return truncate_to_tokens(text, max_tokens, model_name) # Fallback to truncation if summarization fails
+
+# --- Concurrency Helpers ---
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))  # Max in-flight AI calls per fan-out
+
+def run_concurrently(func, items, max_workers=LLM_MAX_CONCURRENCY, on_complete=None, warm_first=False):
+    """
+    Run func(item) for every item on a bounded thread pool.
+    Results are returned in input order (None for items that raised); on_complete(index, result)
+    is invoked on the calling thread as each item finishes, so it can safely update progress widgets.
+    Worker threads inherit the Streamlit script context so st.* calls and session_state keep working.
+    warm_first runs the first item on its own before fanning out, so prompts sharing a prefix
+    find it in the provider's prompt cache instead of all missing at once.
+    """
+    items = list(items)
+    results = [None] * len(items)
+    if not items:
+        return results
+
+    ctx = get_script_run_ctx() if get_script_run_ctx else None
+
+    def _run(item):
+        if ctx is not None:
+            add_script_run_ctx(threading.current_thread(), ctx)
+        return func(item)
+
+    start = 0
+    if warm_first and len(items) > 1:
+        try:
+            results[0] = func(items[0])
+        except Exception:
+            traceback.print_exc()
+        if on_complete:
+            on_complete(0, results[0])
+        start = 1
+
+    with ThreadPoolExecutor(max_workers=max(1, min(int(max_workers), len(items) - start))) as executor:
+        futures = {executor.submit(_run, items[idx]): idx for idx in range(start, len(items))}
+        for future in as_completed(futures):
+            idx = futures[future]
+            try:
+                results[idx] = future.result()
+            except Exception:
+                traceback.print_exc()
+                results[idx] = None
+            if on_complete:
+                on_complete(idx, results[idx])
+    return results
 
 def extract_fields(text):
     fields = {
@@ -446,125 +1731,358 @@ def parse_generated_opportunities(text):
     return out
 
 
-def fetch_dst_announcements(url=DST_ANNOUNCEMENTS_URL, timeout=20):
+@st.cache_resource
+def get_http_session():
     """
-    Fetch DST "What's New -> Announcement" page and extract announcement titles + links.
-    Returns a list of opportunity dicts compatible with the Grant Finder display.
+    Process-wide requests.Session shared by all scrapers: keep-alive connection pools per host and
+    retry-with-backoff on connection errors and transient 5xx responses. The session is never mutated after
+    creation (per-request headers/verify are passed to .get), so it is safe to share across threads.
     """
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) GrantFinder/1.0"
-    }
-    resp = requests.get(url, headers=headers, timeout=timeout)
-    resp.raise_for_status()
+    retry = Retry(
+        total=HTTP_RETRY_TOTAL,
+        backoff_factor=HTTP_RETRY_BACKOFF,
+        status_forcelist=(500, 502, 503, 504),
+        allowed_methods=frozenset(["GET", "HEAD"]),
+        raise_on_status=False,  # Hand the final response back so callers' raise_for_status/status checks still apply
+    )
+    adapter = HTTPAdapter(pool_connections=HTTP_POOL_HOSTS, pool_maxsize=HTTP_POOL_MAXSIZE, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update(UA_HEADERS)
+    return session
 
-    soup = BeautifulSoup(resp.text, "html.parser")
 
-    items = []
-    seen = set()
+class CachedHTTPResponse:
+    """
+    The subset of requests.Response the scrapers use. not_modified is True when the body came from the
+    on-disk cache after a 304 revalidation; truncated is True when reading stopped at max_bytes before the body ended.
+    """
+    def __init__(self, url, status_code, headers, content, not_modified=False, truncated=False):
+        self.url = url
+        self.status_code = status_code
+        self.headers = requests.structures.CaseInsensitiveDict(headers or {})
+        self.content = content
+        self.not_modified = not_modified
+        self.truncated = truncated
 
-    # Collect all meaningful links (program rows + recent announcements are both link-heavy)
-    for a in soup.select("a[href]"):
-        title = a.get_text(" ", strip=True)
-        href = a.get("href")
-        if not title or not href:
-            continue
-        abs_url = urljoin(url, href)
+    @property
+    def text(self):
+        encoding = requests.utils.get_encoding_from_headers(self.headers) or "utf-8"
+        return self.content.decode(encoding, errors="replace")
 
-        # Skip obvious nav/social links; keep PDFs and announcement/program links
-        if any(x in abs_url.lower() for x in ["facebook.com", "twitter.com", "youtube.com", "sitemap", "contact", "feedback"]):
-            continue
-        if len(title) < 8:
-            continue
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} Error for url: {self.url}", response=self)
 
-        key = (title, abs_url)
-        if key in seen:
-            continue
-        seen.add(key)
 
-        items.append(
-            {
-                "scheme_name": title,
-                "funding_agency": "Department of Science & Technology (DST)",
-                "last_date_submission": "N/A",
-                "description": f"Source: {abs_url}",
-                "source_url": abs_url,
-                "full_text_content": f"{title}\n{abs_url}",
-            }
-        )
+def _http_cache_path(url, suffix):
+    return HTTP_CACHE_DIR / f"{hashlib.sha256(url.encode('utf-8')).hexdigest()}.{suffix}"
 
-    return items
 
+def _write_http_cache_file(path, data: bytes):
+    # Write-then-rename so concurrent readers never see a partial file
+    HTTP_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+    _maybe_prune_http_cache()
+
+
+_HTTP_CACHE_PRUNE_LOCK = threading.Lock()
+_HTTP_CACHE_PRUNE_STATE = {"last_pruned_at": 0.0}
+
+
+def prune_http_cache(max_bytes=HTTP_CACHE_MAX_BYTES, max_age_s=HTTP_CACHE_MAX_AGE_SECONDS):
+    """
+    Evict whole URL entries (body, meta and parse memos share a file prefix), least recently used first,
+    until the cache directory is under max_bytes; entries unused for max_age_s go regardless.
+    Returns the number of entries evicted.
+    """
+    try:
+        paths = list(HTTP_CACHE_DIR.iterdir())
+    except OSError:
+        return 0
+    entries = {}
+    for path in paths:
+        if path.name.endswith(".tmp"):
+            continue  # A write in progress
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        entry = entries.setdefault(path.name.split(".", 1)[0], {"paths": [], "size": 0, "used_at": 0.0})
+        entry["paths"].append(path)
+        entry["size"] += stat.st_size
+        entry["used_at"] = max(entry["used_at"], stat.st_mtime)
+
+    total = sum(entry["size"] for entry in entries.values())
+    cutoff = time.time() - max_age_s
+    evicted = 0
+    for entry in sorted(entries.values(), key=lambda e: e["used_at"]):
+        if total <= max_bytes and entry["used_at"] >= cutoff:
+            break
+        for path in entry["paths"]:
+            try:
+                path.unlink()
+            except OSError:
+                pass
+        total -= entry["size"]
+        evicted += 1
+    return evicted
+
+
+def _maybe_prune_http_cache():
+    # Directory scans are throttled; at most one thread prunes at a time
+    now = time.time()
+    if now - _HTTP_CACHE_PRUNE_STATE["last_pruned_at"] < HTTP_CACHE_PRUNE_INTERVAL_SECONDS:
+        return
+    if not _HTTP_CACHE_PRUNE_LOCK.acquire(blocking=False):
+        return
+    try:
+        _HTTP_CACHE_PRUNE_STATE["last_pruned_at"] = now
+        prune_http_cache()
+    except Exception:
+        traceback.print_exc()
+    finally:
+        _HTTP_CACHE_PRUNE_LOCK.release()
+
+
+def http_get_cached(url, timeout=20, max_bytes=None, byte_range=None, **kwargs):
+    """
+    GET through the shared session, revalidating any cached copy with If-None-Match / If-Modified-Since.
+    A 304 returns the cached body (not_modified=True). Complete 200 responses carrying an ETag or Last-Modified are stored.
+    max_bytes stops reading the body after that many bytes (truncated=True; never cached). byte_range is sent as the
+    Range header (e.g. "bytes=0-1023" or the suffix form "bytes=-1024"); each range is cached separately and a 206
+    is cached like a 200.
+    """
+    cache_key = f"{url} {byte_range}" if byte_range else url
+    meta_path, body_path = _http_cache_path(cache_key, "meta.json"), _http_cache_path(cache_key, "body")
+    request_headers = dict(kwargs.pop("headers", None) or {})
+    if byte_range:
+        request_headers["Range"] = byte_range
+
+    meta = None
+    if not HTTP_CACHE_DISABLED and meta_path.exists() and body_path.exists():
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            meta = None
+
+    if meta:
+        if meta.get("etag"):
+            request_headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            request_headers["If-Modified-Since"] = meta["last_modified"]
+
+    resp = get_http_session().get(url, timeout=timeout, headers=request_headers, stream=True, **kwargs)
+    try:
+        if resp.status_code == 304 and meta:
+            try:
+                os.utime(body_path)  # Marks the entry as recently used for prune_http_cache
+            except OSError:
+                pass
+            return CachedHTTPResponse(url, meta.get("status", 200), meta.get("headers"), body_path.read_bytes(), not_modified=True)
+        buf = bytearray()
+        truncated = False
+        for chunk in resp.iter_content(chunk_size=65536):
+            if not chunk:
+                continue
+            buf.extend(chunk)
+            if max_bytes and len(buf) >= max_bytes:
+                truncated = resp.headers.get("Content-Length") != str(len(buf))
+                break
+    finally:
+        resp.close()  # Streamed responses only go back to the pool once closed
+
+    content = bytes(buf)
+    response_headers = dict(resp.headers)
+    etag, last_modified = resp.headers.get("ETag"), resp.headers.get("Last-Modified")
+    if not HTTP_CACHE_DISABLED and not truncated and resp.status_code in (200, 206) and (etag or last_modified):
+        try:
+            _write_http_cache_file(body_path, content)
+            _write_http_cache_file(
+                meta_path,
+                json.dumps(
+                    {
+                        "url": url,
+                        "etag": etag,
+                        "last_modified": last_modified,
+                        "range": byte_range,
+                        "status": resp.status_code,
+                        "headers": {
+                            k: v for k, v in response_headers.items() if k.lower() in ("content-type", "etag", "last-modified", "content-range")
+                        },
+                        "stored_at": time.time(),
+                    }
+                ).encode("utf-8"),
+            )
+        except OSError:
+            traceback.print_exc()
+    return CachedHTTPResponse(url, resp.status_code, response_headers, content, truncated=truncated)
 
-def fetch_anrf_homepage(url=ANRF_HOMEPAGE_URL, timeout=20):
+
+def load_parsed_from_http_cache(resp, parser_name):
     """
-    Fetch ANRF homepage and extract program/call links.
-    Note: The site is interactive; this is a best-effort HTML parse that still yields useful links.
-    Returns a list of opportunity dicts compatible with the Grant Finder display.
+    Parse results memoized for this exact body (a 304 or an unchanged 200), or None.
     """
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) GrantFinder/1.0"
+    if HTTP_CACHE_DISABLED:
+        return None
+    path = _http_cache_path(resp.url, f"{parser_name}.parsed.json")
+    try:
+        cached = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    body_hash = hashlib.sha256(resp.content).hexdigest()
+    if cached.get("body_sha256") != body_hash or cached.get("version") != HTTP_PARSE_CACHE_VERSION:
+        return None
+    return cached.get("result")
+
+
+def store_parsed_in_http_cache(resp, parser_name, result):
+    if HTTP_CACHE_DISABLED or getattr(resp, "truncated", False):
+        return  # A parse of a cut-off body must not be replayed as the page's result
+    total = _http_total_size(resp)
+    if total is not None and total > len(resp.content):
+        return  # Same for a ranged 206 that holds only part of the resource
+    payload = {
+        "version": HTTP_PARSE_CACHE_VERSION,
+        "body_sha256": hashlib.sha256(resp.content).hexdigest(),
+        "result": result,
     }
-    resp = requests.get(url, headers=headers, timeout=timeout)
-    resp.raise_for_status()
+    try:
+        _write_http_cache_file(_http_cache_path(resp.url, f"{parser_name}.parsed.json"), json.dumps(payload, ensure_ascii=False).encode("utf-8"))
+    except OSError:
+        traceback.print_exc()
+
+
+# Per-source rules for the shared link-extraction engine (extract_links / fetch_html_link_opportunities).
+# url_must_contain / url_exclude / title_keywords are case-insensitive substring matches; fallback_title, when set,
+# yields the page itself as a single entry if no link survives the filters.
+HTML_LINK_SOURCES = {
+    "dst_announcements": {
+        "funding_agency": "Department of Science & Technology (DST)",
+        "min_title_len": 8,
+        # Skip obvious nav/social links; keep PDFs and announcement/program links
+        "url_exclude": ["facebook.com", "twitter.com", "youtube.com", "sitemap", "contact", "feedback"],
+    },
+    "anrf_homepage": {
+        "funding_agency": "Anusandhan National Research Foundation (ANRF)",
+        "min_title_len": 6,
+        "url_must_contain": ["anrfonline.in"],
+        "title_keywords": ["call", "proposal", "grant", "fellowship", "program", "scheme", "mission", "fund"],
+        "fallback_title": "ANRF Portal - Programs / Calls",
+    },
+    "india_science_technology": {
+        "funding_agency": "India Science & Technology (GoI)",
+        "min_title_len": 8,
+        "url_must_contain": ["indiascienceandtechnology.gov.in"],
+        # Keep items that look like opportunities/calls/announcements; avoid generic navigation
+        "title_keywords": [
+            "call", "proposal", "grant", "fund", "fellow", "fellowship", "invited", "invitation", "applications",
+            "apply", "scheme", "program", "programme", "announcement", "opportunity",
+        ],
+        "fallback_title": "India Science & Technology - Latest Updates",
+    },
+}
 
-    soup = BeautifulSoup(resp.text, "html.parser")
 
-    items = []
-    seen = set()
+@functools.lru_cache(maxsize=64)
+def _substring_matcher(words):
+    """
+    One precompiled alternation for a tuple of lowercase substrings (None when the tuple is empty).
+    """
+    if not words:
+        return None
+    return re.compile("|".join(re.escape(w.lower()) for w in sorted(words, key=len, reverse=True)))
+
+
+def _iter_anchors(html_text):
+    """
+    Yield (title, href) for every <a href> in the page. Uses lxml when installed; otherwise BeautifulSoup
+    with a SoupStrainer so only <a> tags are built. Titles match BeautifulSoup's get_text(" ", strip=True).
+    """
+    if lxml_html is not None:
+        try:
+            # Re-encode so lxml neither rejects an XML encoding declaration nor guesses a charset
+            doc = lxml_html.document_fromstring(html_text.encode("utf-8"), parser=lxml_html.HTMLParser(encoding="utf-8"))
+        except Exception:
+            return  # Empty or unparseable document
+        for a in doc.iter("a"):
+            href = a.get("href")
+            if href:
+                yield " ".join(t.strip() for t in a.xpath(".//text()") if t.strip()), href
+        return
+
+    soup = BeautifulSoup(html_text, "html.parser", parse_only=SoupStrainer("a", href=True))
+    for a in soup.find_all("a", href=True):
+        yield a.get_text(" ", strip=True), a.get("href")
 
-    # Prefer obvious “calls”/“proposal”/program links; fall back to general internal links.
-    for a in soup.select("a[href]"):
-        title = a.get_text(" ", strip=True)
-        href = a.get("href")
-        if not title or not href:
-            continue
-        abs_url = urljoin(url, href)
 
-        # Keep only ANRF internal links
-        if "anrfonline.in" not in abs_url.lower():
+def extract_links(html_text, base_url, rules):
+    """
+    Filtered, de-duplicated (title, absolute_url) pairs from a page's anchors, in document order.
+    rules: an HTML_LINK_SOURCES-style dict (min_title_len, url_must_contain, url_exclude, title_keywords).
+    """
+    min_title_len = rules.get("min_title_len", 0)
+    must_contain = _substring_matcher(tuple(rules.get("url_must_contain") or ()))
+    exclude = _substring_matcher(tuple(rules.get("url_exclude") or ()))
+    keywords = _substring_matcher(tuple(rules.get("title_keywords") or ()))
+
+    links = []
+    seen = set()
+    for title, href in _iter_anchors(html_text):
+        if not title or len(title) < min_title_len:
             continue
-        if len(title) < 6:
+        abs_url = urljoin(base_url, href)
+        abs_url_l = abs_url.lower()
+        if must_contain and not must_contain.search(abs_url_l):
             continue
-
-        title_l = title.lower()
-        keep = any(
-            k in title_l
-            for k in [
-                "call",
-                "proposal",
-                "grant",
-                "fellowship",
-                "program",
-                "scheme",
-                "mission",
-                "fund",
-            ]
-        )
-        if not keep:
+        if exclude and exclude.search(abs_url_l):
+            continue
+        if keywords and not keywords.search(title.lower()):
             continue
-
         key = (title, abs_url)
         if key in seen:
             continue
         seen.add(key)
+        links.append(key)
+    return links
 
-        items.append(
-            {
-                "scheme_name": title,
-                "funding_agency": "Anusandhan National Research Foundation (ANRF)",
-                "last_date_submission": "N/A",
-                "description": f"Source: {abs_url}",
-                "source_url": abs_url,
-                "full_text_content": f"{title}\n{abs_url}",
-            }
-        )
 
-    # If parsing yields nothing, still provide the homepage as a single “opportunity” entry.
-    if not items:
+def fetch_html_link_opportunities(url, source_key, timeout=20, rules=None, resp=None):
+    """
+    Fetch a portal page and turn its matching links into opportunity dicts compatible with the Grant Finder display.
+    source_key names the parse-cache entry and (unless rules is given) the HTML_LINK_SOURCES rules to apply.
+    Pass resp to reuse an already fetched response.
+    """
+    rules = rules or HTML_LINK_SOURCES[source_key]
+    if resp is None:
+        resp = http_get_cached(url, timeout=timeout)
+        resp.raise_for_status()
+    cached_items = load_parsed_from_http_cache(resp, source_key)
+    if cached_items is not None:
+        return cached_items
+
+    agency = rules.get("funding_agency", "N/A")
+    items = [
+        {
+            "scheme_name": title,
+            "funding_agency": agency,
+            "last_date_submission": "N/A",
+            "description": f"Source: {abs_url}",
+            "source_url": abs_url,
+            "full_text_content": f"{title}\n{abs_url}",
+        }
+        for title, abs_url in extract_links(resp.text, url, rules)
+    ]
+
+    # If parsing yields nothing, still provide the page as a single “opportunity” entry.
+    if not items and rules.get("fallback_title"):
         items.append(
             {
-                "scheme_name": "ANRF Portal - Programs / Calls",
-                "funding_agency": "Anusandhan National Research Foundation (ANRF)",
+                "scheme_name": rules["fallback_title"],
+                "funding_agency": agency,
                 "last_date_submission": "N/A",
                 "description": f"Source: {url}",
                 "source_url": url,
@@ -572,6 +2090,7 @@ def fetch_anrf_homepage(url=ANRF_HOMEPAGE_URL, timeout=20):
             }
         )
 
+    store_parsed_in_http_cache(resp, source_key, items)
     return items
 
 
@@ -585,27 +2104,22 @@ def fetch_google_sheet_opportunities(
     timeout: int = 30,
     max_bytes: int = 5_000_000,
     max_rows: int = 2000,
+    sheet_url: str = OPPORTUNITY_SHEET_URL,
 ):
     """
     Fetch a Google Sheet via CSV export (requires the sheet to be publicly accessible).
-    Returns opportunity dicts.
+    Returns opportunity dicts; rows without a link point at sheet_url.
     """
     url = _google_sheet_csv_export_url(sheet_id, gid)
-    headers = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) GrantFinder/1.0"}
-    resp = requests.get(url, headers=headers, timeout=timeout, stream=True)
+    resp = http_get_cached(url, timeout=timeout, max_bytes=max_bytes)
     # If the sheet is not public, Google often returns 403/404 or an HTML interstitial.
     if resp.status_code != 200:
         raise RuntimeError(f"Google Sheet CSV export not accessible (HTTP {resp.status_code}). Make sure the sheet is shared publicly or published to web.")
+    cached_items = load_parsed_from_http_cache(resp, "google_sheet")
+    if cached_items is not None:
+        return cached_items
 
-    buf = bytearray()
-    for chunk in resp.iter_content(chunk_size=65536):
-        if not chunk:
-            continue
-        buf.extend(chunk)
-        if len(buf) >= max_bytes:
-            break
-
-    text = buf.decode("utf-8", errors="replace")
+    text = resp.content.decode("utf-8", errors="replace")
     # If we got HTML instead of CSV, bail with a helpful message.
     if "<html" in text.lower() and "google" in text.lower():
         raise RuntimeError("Google Sheet returned HTML instead of CSV. Please publish the sheet (File → Share/Publish to web) or make it accessible to anyone with the link.")
@@ -676,71 +2190,61 @@ def fetch_google_sheet_opportunities(
                 "funding_agency": funding_agency or "N/A",
                 "last_date_submission": last_date or "N/A",
                 "description": description or "N/A",
-                "source_url": source_url or OPPORTUNITY_SHEET_URL,
+                "source_url": source_url or sheet_url,
                 "full_text_content": " | ".join([c.strip() for c in row if (c or "").strip()])[:4000],
             }
         )
 
+    store_parsed_in_http_cache(resp, "google_sheet", items)
     return items
 
 
-def fetch_india_science_technology_latest(url: str = INDIA_SCI_TECH_LATEST_URL, timeout: int = 25):
+def fetch_pdf_list_opportunities(url, parser_key, rules, timeout=30):
     """
-    Fetch IndiaScienceAndTechnology 'Latest Updates' and extract likely opportunity/call links.
-    Returns a list of opportunity dicts compatible with the Grant Finder display.
+    Opportunities from a PDF that lists calls (e.g. a funder's annual call calendar): every line matching the
+    rules' title_keywords becomes an entry, with the first link and date found on it or the two lines after.
+    The whole document is needed, so it is downloaded in full (up to PDF_FULL_MAX_BYTES); rules may set max_pages.
     """
-    headers = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) GrantFinder/1.0"}
-    try:
-        resp = requests.get(url, headers=headers, timeout=timeout)
-        resp.raise_for_status()
-    except requests.exceptions.SSLError:
-        # Some Windows environments lack the CA chain for this site; retry without verification.
-        resp = requests.get(url, headers=headers, timeout=timeout, verify=False)
-        resp.raise_for_status()
-
-    soup = BeautifulSoup(resp.text, "html.parser")
+    resp = http_get_cached(url, timeout=timeout, max_bytes=PDF_FULL_MAX_BYTES)
+    resp.raise_for_status()
+    if resp.truncated:
+        raise RuntimeError(f"PDF list larger than PDF_FULL_MAX_BYTES ({PDF_FULL_MAX_BYTES // (1024 * 1024)} MB): {url}")
+    cached_items = load_parsed_from_http_cache(resp, parser_key)
+    if cached_items is not None:
+        return cached_items
+
+    min_title_len = rules.get("min_title_len", 0)
+    keywords = _substring_matcher(tuple(rules.get("title_keywords") or ()))
+    agency = rules.get("funding_agency", "N/A")
+    reader, _ = _load_pdf_reader(resp, url, timeout=timeout)
+    pdf_text = _extract_pdf_text(reader, max_pages=rules.get("max_pages", PDF_MAX_PAGES))
+    lines = [ln.strip() for ln in pdf_text.splitlines() if ln.strip()]
     items = []
     seen = set()
-
-    for a in soup.select("a[href]"):
-        title = a.get_text(" ", strip=True)
-        href = a.get("href")
-        if not title or not href:
-            continue
-        abs_url = urljoin(url, href)
-        if "indiascienceandtechnology.gov.in" not in abs_url.lower():
-            continue
-        if len(title) < 8:
-            continue
-
-        t = title.lower()
-        # Keep items that look like opportunities/calls/announcements; avoid generic navigation
-        keep = any(k in t for k in ["call", "proposal", "grant", "fund", "fellow", "fellowship", "invited", "invitation", "applications", "apply", "scheme", "program", "programme", "announcement", "opportunity"])
-        if not keep:
+    for idx, line in enumerate(lines):
+        if len(line) < min_title_len or (keywords and not keywords.search(line.lower())):
             continue
-
-        key = (title, abs_url)
-        if key in seen:
+        if line in seen:
             continue
-        seen.add(key)
-
+        seen.add(line)
+        window = "\n".join(lines[idx : idx + 3])
+        link = re.search(r"https?://[^\s<>\"')]+", window)
         items.append(
             {
-                "scheme_name": title,
-                "funding_agency": "India Science & Technology (GoI)",
-                "last_date_submission": "N/A",
-                "description": f"Source: {abs_url}",
-                "source_url": abs_url,
-                "full_text_content": f"{title}\n{abs_url}",
+                "scheme_name": line[:300],
+                "funding_agency": agency,
+                "last_date_submission": _extract_deadline_from_text(window) or "N/A",
+                "description": f"Source: {url}",
+                "source_url": link.group(0).rstrip(".,;") if link else url,
+                "full_text_content": window[:4000],
             }
         )
 
-    # If nothing was found, still provide the page as a single entry for visibility.
-    if not items:
+    if not items and rules.get("fallback_title"):
         items.append(
             {
-                "scheme_name": "India Science & Technology - Latest Updates",
-                "funding_agency": "India Science & Technology (GoI)",
+                "scheme_name": rules["fallback_title"],
+                "funding_agency": agency,
                 "last_date_submission": "N/A",
                 "description": f"Source: {url}",
                 "source_url": url,
@@ -748,9 +2252,246 @@ def fetch_india_science_technology_latest(url: str = INDIA_SCI_TECH_LATEST_URL,
             }
         )
 
+    store_parsed_in_http_cache(resp, parser_key, items)
     return items
 
 
+GRANT_SOURCES_DEADLINE_SECONDS = float(os.getenv("GRANT_SOURCES_DEADLINE_SECONDS", "35"))
+# Built-in source registry for Grant Finder and ingestion. sources.json (found like taxonomy.json, or via SOURCES_PATH)
+# can override fields of these by name, switch one off with "enabled": false, or add funders (ICMR, DBT, more sheet gids).
+# Every source has: name, type (html_links | csv_sheet | pdf_list), url, refresh_interval_s, max_concurrency
+# (concurrent requests to its host, shared with deadline enrichment) and timeout_s; deadline_s optionally caps its
+# wall-clock time per crawl. html_links / pdf_list take "rules": an HTML_LINK_SOURCES key or an inline rules dict.
+# csv_sheet takes sheet_id and gid (read from url when omitted).
+DEFAULT_GRANT_SOURCES = [
+    {"name": "DST", "type": "html_links", "url": DST_ANNOUNCEMENTS_URL, "rules": "dst_announcements", "timeout_s": 20},
+    {"name": "ANRF", "type": "html_links", "url": ANRF_HOMEPAGE_URL, "rules": "anrf_homepage", "timeout_s": 20},
+    {
+        "name": "Sheet",
+        "type": "csv_sheet",
+        "url": OPPORTUNITY_SHEET_URL,
+        "sheet_id": OPPORTUNITY_SHEET_ID,
+        "gid": OPPORTUNITY_SHEET_GID,
+        "timeout_s": 30,
+    },
+    {
+        "name": "IndiaS&T",
+        "type": "html_links",
+        "url": INDIA_SCI_TECH_LATEST_URL,
+        "rules": "india_science_technology",
+        "timeout_s": 25,
+        # Some Windows environments lack the CA chain for this site; retry without verification.
+        "insecure_ssl_fallback": True,
+    },
+]
+OPPORTUNITY_SCHEDULER_TICK_SECONDS = 300  # Longest the scheduler sleeps, so sources.json edits are picked up
+
+
+def _find_config_file(filename: str, env_var: str) -> Path:
+    candidates = []
+    configured_path = os.getenv(env_var) or ""
+    if not configured_path:
+        try:
+            configured_path = st.secrets.get(env_var, "")
+        except Exception:
+            configured_path = ""
+    if configured_path:
+        candidates.append(Path(configured_path))
+    for base_dir in (BASE_DIR, Path.cwd()):
+        candidates.append(base_dir / filename)
+        candidates.append(base_dir.parent / filename)
+        candidates.append(base_dir.parent.parent / filename)
+    for candidate in candidates:
+        if candidate.exists():
+            return candidate
+    return candidates[0] if candidates else (BASE_DIR / filename)
+
+
+def _parse_google_sheet_url(url: str):
+    sheet_match = re.search(r"/spreadsheets/d/([A-Za-z0-9_-]+)", url or "")
+    gid_match = re.search(r"[#&?]gid=(\d+)", url or "")
+    return (sheet_match.group(1) if sheet_match else None), (gid_match.group(1) if gid_match else "0")
+
+
+def _source_rules(source):
+    rules = source.get("rules") or {}
+    rules = dict(HTML_LINK_SOURCES[rules]) if isinstance(rules, str) else dict(rules)
+    if source.get("funding_agency"):
+        rules["funding_agency"] = source["funding_agency"]
+    return rules
+
+
+def _source_parser_key(source):
+    # Memo name tied to the rules, so editing them in sources.json reparses cached pages
+    digest = hashlib.sha256(json.dumps(_source_rules(source), sort_keys=True).encode("utf-8")).hexdigest()[:12]
+    return f"{source['type']}_{digest}"
+
+
+def normalize_grant_source(entry):
+    """
+    Validate one registry entry and fill in defaults. Raises ValueError for an unusable entry.
+    """
+    source = dict(entry)
+    source["name"] = str(source.get("name") or "").strip()
+    if not source["name"]:
+        raise ValueError("source without a name")
+    if source.get("type") not in GRANT_SOURCE_FETCHERS:
+        raise ValueError(f"{source['name']}: unknown type {source.get('type')!r} (expected one of {', '.join(GRANT_SOURCE_FETCHERS)})")
+    if not source.get("url"):
+        raise ValueError(f"{source['name']}: url is required")
+    if source["type"] == "csv_sheet" and not source.get("sheet_id"):
+        source["sheet_id"], source["gid"] = _parse_google_sheet_url(source["url"])
+        if not source["sheet_id"]:
+            raise ValueError(f"{source['name']}: sheet_id is required (or a Google Sheets url)")
+    if isinstance(source.get("rules"), str) and source["rules"] not in HTML_LINK_SOURCES:
+        raise ValueError(f"{source['name']}: unknown rules {source['rules']!r}")
+    source["enabled"] = bool(source.get("enabled", True))
+    source["refresh_interval_s"] = float(source.get("refresh_interval_s") or OPPORTUNITY_INGEST_INTERVAL_SECONDS)
+    source["max_concurrency"] = max(1, int(source.get("max_concurrency") or DEADLINE_ENRICH_PER_HOST))
+    source["timeout_s"] = float(source.get("timeout_s") or 20)
+    return source
+
+
+@st.cache_resource
+def load_source_registry(sources_path: Path, file_mtime: Optional[float]):
+    """
+    DEFAULT_GRANT_SOURCES merged with sources.json: a list of entries, or {"sources": [...], "replace_defaults": bool}.
+    Entries matching a default by name update it. Invalid entries are reported on stderr and skipped.
+    """
+    overrides, replace_defaults = [], False
+    if file_mtime is not None:
+        try:
+            with open(sources_path, "r", encoding="utf-8") as f:
+                config = json.load(f)
+            if isinstance(config, dict):
+                overrides, replace_defaults = config.get("sources") or [], bool(config.get("replace_defaults"))
+            else:
+                overrides = config
+        except (OSError, ValueError) as e:
+            print(f"{sources_path}: ignored ({e}); using built-in sources", file=sys.stderr)
+
+    merged = {} if replace_defaults else {s["name"]: dict(s) for s in DEFAULT_GRANT_SOURCES}
+    for entry in overrides:
+        if isinstance(entry, dict):
+            merged.setdefault(str(entry.get("name") or "").strip(), {}).update(entry)
+
+    sources = []
+    for entry in merged.values():
+        try:
+            sources.append(normalize_grant_source(entry))
+        except ValueError as e:
+            print(f"{sources_path}: skipping source ({e})", file=sys.stderr)
+    return sources
+
+
+def load_grant_sources(include_disabled=False):
+    """
+    The current source registry (re-read whenever sources.json changes).
+    """
+    sources_path = _find_config_file("sources.json", "SOURCES_PATH")
+    sources_mtime = sources_path.stat().st_mtime if sources_path.exists() else None
+    return [dict(s) for s in load_source_registry(sources_path, sources_mtime) if include_disabled or s["enabled"]]
+
+
+def grant_source_host_limits(sources):
+    """
+    {host: max_concurrency}; the strictest limit wins when several sources share a host.
+    """
+    limits = {}
+    for source in sources:
+        host = urlparse(source["url"]).netloc.lower()
+        limits[host] = min(limits.get(host, source["max_concurrency"]), source["max_concurrency"])
+    return limits
+
+
+def _fetch_html_links_source(source):
+    try:
+        resp = http_get_cached(source["url"], timeout=source["timeout_s"])
+        resp.raise_for_status()
+    except requests.exceptions.SSLError:
+        if not source.get("insecure_ssl_fallback"):
+            raise
+        resp = http_get_cached(source["url"], timeout=source["timeout_s"], verify=False)
+        resp.raise_for_status()
+    return fetch_html_link_opportunities(source["url"], _source_parser_key(source), rules=_source_rules(source), resp=resp)
+
+
+def _fetch_csv_sheet_source(source):
+    return fetch_google_sheet_opportunities(
+        sheet_id=source["sheet_id"],
+        gid=source.get("gid") or "0",
+        timeout=source["timeout_s"],
+        sheet_url=source["url"],
+    )
+
+
+def _fetch_pdf_list_source(source):
+    return fetch_pdf_list_opportunities(source["url"], _source_parser_key(source), _source_rules(source), timeout=source["timeout_s"])
+
+
+# Registry "type" -> fetch_fn(source) returning opportunity dicts
+GRANT_SOURCE_FETCHERS = {
+    "html_links": _fetch_html_links_source,
+    "csv_sheet": _fetch_csv_sheet_source,
+    "pdf_list": _fetch_pdf_list_source,
+}
+
+
+def fetch_grant_sources_concurrently(sources=None, deadline_s=GRANT_SOURCES_DEADLINE_SECONDS, on_result=None):
+    """
+    Run source fetchers in parallel, each waiting for a slot under its host's max_concurrency.
+    sources: registry entries (default: load_grant_sources()). Returns {name: {"items": list, "error": Exception or None,
+    "elapsed": seconds}} in the order given; a source still running after min(its deadline_s, deadline_s) gets a
+    TimeoutError and is abandoned. on_result(name, result) is invoked on the calling thread as each source finishes.
+    """
+    sources = load_grant_sources() if sources is None else sources
+    started = time.time()
+    results = {source["name"]: {"items": [], "error": None, "elapsed": None} for source in sources}
+    if not sources:
+        return results
+
+    limiter = get_host_concurrency_limiter()
+    limiter.set_host_limits(grant_source_host_limits(sources))
+
+    def _run(source, source_deadline):
+        semaphore = limiter.semaphore(source["url"])
+        if not semaphore.acquire(timeout=max(0.0, source_deadline - time.time())):
+            raise TimeoutError(f"no free slot for {urlparse(source['url']).netloc} within the deadline")
+        try:
+            return GRANT_SOURCE_FETCHERS[source["type"]](source)
+        finally:
+            semaphore.release()
+
+    executor = ThreadPoolExecutor(max_workers=len(sources), thread_name_prefix="grant-source")
+    deadlines = {}
+    for source in sources:
+        source_deadline = started + min(deadline_s, source.get("deadline_s") or deadline_s)
+        deadlines[executor.submit(_run, source, source_deadline)] = (source["name"], source_deadline)
+    pending = set(deadlines)
+    try:
+        while pending:
+            now = time.time()
+            for future in [f for f in pending if deadlines[f][1] <= now]:
+                pending.discard(future)
+                name = deadlines[future][0]
+                results[name]["error"] = TimeoutError(f"no response within {deadlines[future][1] - started:.0f}s")
+            if not pending:
+                break
+            done, pending = wait(pending, timeout=min(deadlines[f][1] for f in pending) - now, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = deadlines[future][0]
+                try:
+                    results[name]["items"] = future.result() or []
+                except Exception as e:
+                    results[name]["error"] = e
+                results[name]["elapsed"] = time.time() - started
+                if on_result:
+                    on_result(name, results[name])
+    finally:
+        # Don't block on stragglers; their threads finish (or time out) in the background
+        executor.shutdown(wait=False, cancel_futures=True)
+    return results
+
 def rank_opportunities_by_keywords(opportunities, keywords, top_k=7):
     """
     Lightweight local ranking (no AI): scores opportunities by keyword overlap with title/description.
@@ -801,10 +2542,11 @@ def filter_opportunities_by_keywords(opportunities, keywords):
     return [opp for opp in opportunities if score(opp) > 0]
 
 
-def _extract_deadline_from_text(text: str) -> Optional[str]:
+def _extract_deadline_from_text(text: str, anchored_only: bool = False) -> Optional[str]:
     """
     Best-effort extraction of a submission deadline from arbitrary call text.
     Returns a string representation (as found) or None.
+    anchored_only skips the "first date anywhere" fallback, so only dates near a deadline keyword count.
     """
     if not text:
         return None
@@ -841,6 +2583,9 @@ def _extract_deadline_from_text(text: str) -> Optional[str]:
                 if m:
                     return m.group(1).strip()
 
+    if anchored_only:
+        return None
+
     # Fallback: first date anywhere in the text
     blob = "\n".join(lines[:500])  # cap work
     for dp in date_patterns:
@@ -850,81 +2595,316 @@ def _extract_deadline_from_text(text: str) -> Optional[str]:
     return None
 
 
-def _fetch_text_from_url(url: str, timeout: int = 25) -> str:
+def _fetch_text_from_url(url: str, timeout: int = 25, stop_at_deadline: bool = False) -> str:
     """
     Fetch URL and return extracted text. Supports HTML and PDF (best-effort).
+    The body is streamed and capped at PAGE_FETCH_MAX_BYTES; .pdf URLs are fetched with a Range request and
+    completed as needed by _load_pdf_reader. Raises RuntimeError for a PDF that cannot be parsed.
+    stop_at_deadline ends PDF extraction at the first page where a keyword-anchored deadline appears.
     """
-    headers = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) GrantFinder/1.0"}
-    resp = requests.get(url, headers=headers, timeout=timeout)
+    byte_range = f"bytes=0-{PAGE_FETCH_MAX_BYTES - 1}" if _looks_like_pdf_url(url) else None
+    resp = http_get_cached(url, timeout=timeout, max_bytes=PAGE_FETCH_MAX_BYTES, byte_range=byte_range)
     resp.raise_for_status()
+    parser_name = "page_text_until_deadline" if stop_at_deadline else "page_text"
+    cached_text = load_parsed_from_http_cache(resp, parser_name)
+    if cached_text is not None:
+        return cached_text
+    text, source = _extract_text_from_response(resp, url, stop_at_deadline=stop_at_deadline, timeout=timeout)
+    # Only memoize against this response when the text was parsed from its own body, not a stitched or full re-download
+    if source is resp:
+        store_parsed_in_http_cache(resp, parser_name, text)
+    return text
+
+
+def _looks_like_pdf_url(url: str) -> bool:
+    return urlparse(url).path.lower().endswith(".pdf")
+
+
+def _http_total_size(resp) -> Optional[int]:
+    """
+    Full size of the resource: from Content-Range ("bytes 0-99/1234") on a 206, Content-Length on a 200.
+    """
+    total = re.search(r"/(\d+)\s*$", resp.headers.get("Content-Range") or "")
+    if total:
+        return int(total.group(1))
+    length = resp.headers.get("Content-Length") or ""
+    return int(length) if resp.status_code == 200 and length.isdigit() else None
+
+
+def _open_pdf(content: bytes):
+    # PdfReader with a readable page tree, or None
+    try:
+        reader = PyPDF2.PdfReader(io.BytesIO(content), strict=False)
+        len(reader.pages)
+        return reader
+    except Exception:
+        return None
+
+
+def _load_pdf_reader(resp, url: str, timeout: int = 25):
+    """
+    PdfReader for a PDF response that may hold only the head of the file, as (reader, source).
+    PyPDF2 needs the xref and trailer at the end, so a partial head is completed with the tail (suffix Range),
+    laid out at its real offset in a zero-filled buffer of the full size; source is None for such a stitched
+    reader, whose pages may have their content in the zeroed gap. If that doesn't parse either, the whole file
+    is downloaded (see _load_full_pdf) and source is that response. Raises RuntimeError when no readable PDF
+    can be obtained.
+    """
+    total = _http_total_size(resp)
+    partial = resp.truncated or (total is not None and total > len(resp.content))
+    if not partial:
+        reader = _open_pdf(resp.content)
+        if reader is None:
+            raise RuntimeError(f"Unreadable PDF: {url}")
+        return reader, resp
+
+    if total is not None and len(resp.content) < total <= PDF_FULL_MAX_BYTES:
+        tail = http_get_cached(url, timeout=timeout, max_bytes=PDF_TAIL_BYTES + 1, byte_range=f"bytes=-{PDF_TAIL_BYTES}")
+        if tail.status_code == 206 and not tail.truncated and _http_total_size(tail) == total:
+            buf = bytearray(total)
+            buf[: len(resp.content)] = resp.content
+            buf[total - len(tail.content) :] = tail.content
+            reader = _open_pdf(bytes(buf))
+            if reader is not None:
+                return reader, None
+
+    return _load_full_pdf(url, timeout=timeout)
+
+
+def _load_full_pdf(url: str, timeout: int = 25):
+    """
+    (reader, response) for the whole file, downloaded up to PDF_FULL_MAX_BYTES. Raises RuntimeError otherwise.
+    """
+    full = http_get_cached(url, timeout=timeout, max_bytes=PDF_FULL_MAX_BYTES)
+    full.raise_for_status()
+    reader = None if full.truncated else _open_pdf(full.content)
+    if reader is None:
+        raise RuntimeError(f"Unreadable PDF{' (over PDF_FULL_MAX_BYTES)' if full.truncated else ''}: {url}")
+    return reader, full
+
+
+def _has_zeroed_content(page) -> bool:
+    # An uncompressed content stream from the zero-filled gap of a stitched buffer extracts as "" without raising
+    contents = page.get_contents()
+    return contents is not None and b"\x00" * 16 in contents.get_data()
+
+
+def _extract_pdf_text(reader, stop_at_deadline: bool = False, max_pages: int = PDF_MAX_PAGES, skip_unreadable: bool = True) -> str:
+    """
+    Page-by-page text of the first max_pages pages of a PdfReader. Pages that fail to extract are skipped,
+    or raise RuntimeError when skip_unreadable is False (which also rejects zero-filled content streams).
+    """
+    pages = reader.pages
+    chunks = []
+    for i in range(min(max_pages, len(pages))):
+        try:
+            if not skip_unreadable and _has_zeroed_content(pages[i]):
+                raise ValueError("content stream is zero-filled")
+            chunks.append(pages[i].extract_text() or "")
+        except Exception as e:
+            if not skip_unreadable:
+                raise RuntimeError(f"Unreadable PDF page {i + 1}: {e}") from e
+            continue
+        # Two pages, so a keyword at the foot of one page still pairs with a date at the top of the next
+        if stop_at_deadline and _extract_deadline_from_text("\n".join(chunks[-2:]), anchored_only=True):
+            break
+    return "\n".join(chunks)
+
 
+def _extract_text_from_response(resp, url: str, stop_at_deadline: bool = False, timeout: int = 25):
+    """
+    (text, source): source is the response the text was parsed from, or None for a stitched head+tail PDF.
+    """
     content_type = (resp.headers.get("content-type") or "").lower()
-    is_pdf = "pdf" in content_type or url.lower().endswith(".pdf")
+    is_pdf = "pdf" in content_type or _looks_like_pdf_url(url)
 
     if is_pdf:
+        reader, source = _load_pdf_reader(resp, url, timeout=timeout)
+        if source is not None:
+            return _extract_pdf_text(reader, stop_at_deadline=stop_at_deadline), source
         try:
-            reader = PyPDF2.PdfReader(io.BytesIO(resp.content))
-            chunks = []
-            for page in reader.pages[:10]:  # cap pages for speed
-                try:
-                    chunks.append(page.extract_text() or "")
-                except Exception:
-                    continue
-            return "\n".join(chunks)
-        except Exception:
-            return ""
+            return _extract_pdf_text(reader, stop_at_deadline=stop_at_deadline, skip_unreadable=False), None
+        except RuntimeError:
+            # A page's content fell in the zeroed gap of the stitched buffer; the whole file is needed
+            reader, source = _load_full_pdf(url, timeout=timeout)
+            return _extract_pdf_text(reader, stop_at_deadline=stop_at_deadline), source
 
     # HTML / other: use trafilatura if available, otherwise BeautifulSoup text
     try:
         extracted = trafilatura.extract(resp.text, include_comments=False, include_tables=False)
         if extracted:
-            return extracted
+            return extracted, resp
     except Exception:
         pass
 
     soup = BeautifulSoup(resp.text, "html.parser")
-    return soup.get_text("\n", strip=True)
+    return soup.get_text("\n", strip=True), resp
+
+
+DEADLINE_PENDING = "Pending"  # Enrichment still running when its time budget ran out
+DEADLINE_ENRICH_WORKERS = int(os.getenv("DEADLINE_ENRICH_WORKERS", "8"))
+DEADLINE_ENRICH_PER_HOST = int(os.getenv("DEADLINE_ENRICH_PER_HOST", "2"))  # Concurrent fetches per host (be polite to dst.gov.in & co.)
+DEADLINE_ENRICH_BUDGET_SECONDS = float(os.getenv("DEADLINE_ENRICH_BUDGET_SECONDS", "20"))
+# Persistent URL -> deadline cache (deadline_cache table). Pages without a date and failed fetches are cached
+# negatively, with the retry delay doubling on every repeat up to the cap.
+DEADLINE_CACHE_TTL_SECONDS = int(os.getenv("DEADLINE_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+DEADLINE_NO_DATE_RETRY_SECONDS = 6 * 3600
+DEADLINE_ERROR_RETRY_SECONDS = 15 * 60
+DEADLINE_MAX_RETRY_SECONDS = 7 * 24 * 3600
+
+
+def load_cached_deadlines(urls):
+    """
+    {url: deadline or None} for unexpired cache entries; None marks a negative entry (no date / fetch failed).
+    """
+    urls = list(urls)
+    if not urls:
+        return {}
+    now = time.time()
+    found = {}
+    try:
+        with sqlite3.connect(DATABASE_FILE) as conn:
+            for i in range(0, len(urls), 500):
+                batch = urls[i : i + 500]
+                cursor = conn.execute(
+                    f"SELECT url, deadline FROM deadline_cache WHERE expires_at > ? AND url IN ({','.join('?' * len(batch))})",
+                    [now, *batch],
+                )
+                found.update(dict(cursor.fetchall()))
+    except sqlite3.Error:
+        traceback.print_exc()
+    return found
+
+
+def store_deadline_result(url, deadline, status, content_hash=None):
+    """
+    status: "found", "no_date" or "error". Repeated no_date/error results for unchanged content back off exponentially.
+    """
+    now = time.time()
+    try:
+        with sqlite3.connect(DATABASE_FILE) as conn:
+            row = conn.execute("SELECT status, failures, content_hash FROM deadline_cache WHERE url = ?", (url,)).fetchone()
+            if status == "found":
+                failures = 0
+                ttl = DEADLINE_CACHE_TTL_SECONDS
+            else:
+                # Back off further only while the page is unchanged; new content earns a prompt re-check
+                repeated = row is not None and row[0] != "found" and (content_hash is None or row[2] in (None, content_hash))
+                failures = row[1] + 1 if repeated else 1
+                base = DEADLINE_NO_DATE_RETRY_SECONDS if status == "no_date" else DEADLINE_ERROR_RETRY_SECONDS
+                ttl = min(DEADLINE_MAX_RETRY_SECONDS, base * (2 ** (failures - 1)))
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO deadline_cache (url, deadline, status, content_hash, failures, fetched_at, expires_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                (url, deadline, status, content_hash, failures, now, now + ttl),
+            )
+    except sqlite3.Error:
+        traceback.print_exc()
+
+
+class HostConcurrencyLimiter:
+    """
+    One bounded semaphore per host, shared by every enrichment and source fetch in the process.
+    Hosts listed in host_limits (the registry's max_concurrency) use that size, others per_host;
+    a changed limit gets a fresh semaphore.
+    """
+    def __init__(self, per_host=DEADLINE_ENRICH_PER_HOST, host_limits=None):
+        self.per_host = per_host
+        self.host_limits = dict(host_limits or {})
+        self._semaphores = {}
+        self._lock = threading.Lock()
+
+    def set_host_limits(self, host_limits):
+        with self._lock:
+            self.host_limits.update(host_limits)
+
+    def semaphore(self, url):
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            key = (host, self.host_limits.get(host, self.per_host))
+            if key not in self._semaphores:
+                self._semaphores[key] = threading.BoundedSemaphore(key[1])
+            return self._semaphores[key]
+
+
+@st.cache_resource
+def get_host_concurrency_limiter():
+    return HostConcurrencyLimiter(host_limits=grant_source_host_limits(load_grant_sources()))
+
+
+def _missing_deadline(opp):
+    return not opp.get("last_date_submission") or opp.get("last_date_submission") in ("N/A", DEADLINE_PENDING)
 
 
-def enrich_opportunities_with_deadlines_only(opportunities, max_to_check: int = 10):
+def enrich_opportunities_with_deadlines_only(opportunities, max_to_check: int = 10, budget_s=DEADLINE_ENRICH_BUDGET_SECONDS):
     """
     Mutates opportunities in-place: attempts to populate 'last_date_submission'
-    from the linked call page/PDF when possible. Uses Streamlit session cache.
+    from the linked call page/PDF when possible. Uses the persistent deadline_cache table,
+    shared by all sessions and background ingestion.
+    Pages are fetched on a worker pool (at most DEADLINE_ENRICH_PER_HOST per host) and results are written back
+    as they complete. Opportunities still being fetched after budget_s seconds are marked DEADLINE_PENDING;
+    budget_s=None waits for all of them.
     """
     if not opportunities:
         return opportunities
 
-    cache = st.session_state.get("deadline_cache", {})
-    if not isinstance(cache, dict):
-        cache = {}
+    cache = load_cached_deadlines({opp["source_url"] for opp in opportunities if opp.get("source_url") and _missing_deadline(opp)})
 
-    checked = 0
+    # Pull from the cache when possible (negative entries included), then pick the pages that still need a visit
+    pending_by_url = {}
     for opp in opportunities:
-        if checked >= max_to_check:
+        if len(pending_by_url) >= max_to_check:
             break
         url = opp.get("source_url")
-
-        if not url:
+        if not url or not _missing_deadline(opp):
             continue
-
-        # Pull from caches when possible
-        if url in cache and (not opp.get("last_date_submission") or opp.get("last_date_submission") == "N/A"):
+        if url in cache:
             opp["last_date_submission"] = cache[url] or "N/A"
-        if opp.get("last_date_submission") and opp.get("last_date_submission") != "N/A":
             continue
+        pending_by_url.setdefault(url, []).append(opp)
+
+    if not pending_by_url:
+        return opportunities
 
-        checked += 1
+    started = time.time()
+    limiter = get_host_concurrency_limiter()
+
+    def _visit(url):
+        semaphore = limiter.semaphore(url)
+        remaining = None if budget_s is None else max(0.0, budget_s - (time.time() - started))
+        if not semaphore.acquire(timeout=remaining):
+            # Budget ran out while queued behind this host: nothing stored, so the page is retried next run
+            return DEADLINE_PENDING
         try:
-            txt = _fetch_text_from_url(url)
-            deadline = _extract_deadline_from_text(txt) if (not opp.get("last_date_submission") or opp.get("last_date_submission") == "N/A") else None
+            text = _fetch_text_from_url(url, stop_at_deadline=True)
         except Exception:
-            deadline = None
-
-        if deadline is not None:
-            cache[url] = deadline
-            opp["last_date_submission"] = deadline or "N/A"
+            store_deadline_result(url, None, "error")
+            return None
+        finally:
+            semaphore.release()
+        # Stored here so stragglers that finish after the budget still warm the cache
+        deadline = _extract_deadline_from_text(text)
+        content_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        store_deadline_result(url, deadline, "found" if deadline else "no_date", content_hash)
+        return deadline
+
+    executor = ThreadPoolExecutor(max_workers=max(1, min(DEADLINE_ENRICH_WORKERS, len(pending_by_url))), thread_name_prefix="deadline-enrich")
+    futures = {executor.submit(_visit, url): url for url in pending_by_url}
+    try:
+        for future in as_completed(futures, timeout=budget_s):
+            deadline = future.result()
+            for opp in pending_by_url[futures[future]]:
+                opp["last_date_submission"] = deadline or "N/A"
+    except FuturesTimeoutError:
+        for future, url in futures.items():
+            if not future.done():
+                for opp in pending_by_url[url]:
+                    opp["last_date_submission"] = DEADLINE_PENDING
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
 
-    st.session_state["deadline_cache"] = cache
     return opportunities
 
 
@@ -1067,6 +3047,7 @@ def filter_active_open_calls(opportunities, include_no_deadline: bool = True):
     - Exclude items explicitly marked CLOSED
     - Exclude items with a parsed deadline that is today or in the past (must be > today)
     - Optionally include items with unknown/no deadline (N/A)
+    - Always keep items whose deadline lookup is still pending
     """
     if not opportunities:
         return []
@@ -1081,6 +3062,10 @@ def filter_active_open_calls(opportunities, include_no_deadline: bool = True):
             continue
 
         deadline_str = (opp.get("last_date_submission") or "").strip()
+        if deadline_str == DEADLINE_PENDING:
+            # Deadline lookup ran out of time; keep it rather than hide a possibly open call
+            filtered.append(opp)
+            continue
         dt = _parse_deadline_to_date(deadline_str)
         if dt:
             if dt.date() <= today:
@@ -1105,13 +3090,230 @@ def extract_alignment_score(report_text):
             return None
     return None
 
-def split_proposal_into_sections(full_proposal_draft, template_sections_str):
-    sections = {}
-    template_section_titles = [line.strip() for line in template_sections_str.split('\n') if line.strip()]
+def build_alignment_prompt(user_research_profile, opportunity):
+    return f"""
+            As an expert grant evaluator, critically analyze the alignment between the provided Research Profile and Funding Opportunity.
 
-    # Use a regex to find sections. This assumes section titles are typically at the start of a line and followed by content.
-    # It also tries to handle numbered or bulleted sections.
-    # This is a heuristic and might need adjustment based on typical proposal formats.
+            Instructions:
+            1. Summarize the core expertise and contributions of the research profile (based only on the provided information, assume publications are implicitly part of 'Research Profile' text if not explicitly separated).
+            2. Map this expertise to the funding call's stated priorities, explicitly distinguishing between:
+               - Direct alignment (clear fit with call objectives)
+               - Indirect or speculative alignment (possible applications if reframed)
+               - Non-alignment (areas with no overlap)
+            3. Highlight major gaps that reduce alignment (e.g., domain mismatch, lack of collaborations, lack of translational/clinical orientation).
+            4. Suggest strategies to increase alignment (e.g., reframing expertise, building collaborations, translational roadmaps).
+            5. Assign a critical **Alignment Score (0–10)**, where:
+               - 0–3 = Very weak/no alignment
+               - 4–6 = Moderate alignment (requires strong reframing)
+               - 7–8 = Strong alignment (with clear fit and collaborations)
+               - 9–10 = Excellent alignment (highly competitive)
+            6. Maintain a professional, analytical tone.
+
+            --- Output Structure ---
+            Research Profile Summary:
+            [Summary of core expertise and contributions]
+
+            Alignment with Call Priorities:
+            - Direct Alignment: [Points of direct fit]
+            - Indirect/Speculative Alignment: [Possible applications if reframed]
+            - Non-Alignment: [Areas with no overlap]
+
+            Key Gaps:
+            [Major gaps reducing alignment]
+
+            Strategic Recommendations:
+            [Strategies to increase alignment]
+
+            Alignment Score: X.X/10
+            ---
+
+            Research Profile:
+            {user_research_profile}
+
+            Funding Opportunity:
+            Scheme Name: {opportunity.get('scheme_name', 'N/A')}
+            Funding Agency: {opportunity.get('funding_agency', 'N/A')}
+            Description: {opportunity.get('description', 'N/A')}
+            """
+
+def build_single_pass_brainstorm_prompt(user_research_profile, funding_call, proposal_draft, template_section_titles):
+    """
+    funding_call: dict with funding_agency, scheme_type, thrust_areas, eligibility.
+    """
+    template_sections_bullets = "\n".join(f"- {t}" for t in template_section_titles)
+    return f"""
+                You are a critical grant evaluator. Analyze the following research proposal draft against the funding call and researcher profile.
+
+                --- Researcher Profile ---
+                {user_research_profile}
+
+                --- Funding Call Details ---
+                Funding Agency: {funding_call.get('funding_agency', '')}
+                Scheme Type: {funding_call.get('scheme_type', '')}
+                Thrust Areas: {funding_call.get('thrust_areas', '')}
+                Eligibility: {funding_call.get('eligibility', '')}
+
+                --- Proposal Draft (summarized) ---
+                {proposal_draft}
+
+                --- Template Sections ---
+                {template_sections_bullets}
+
+                For EACH template section, output the following structure exactly:
+                ### [Section Title]
+                **Strengths**
+                - ...
+                - ...
+                **Weaknesses**
+                - ...
+                - ...
+                **Recommendations**
+                - ...
+                - ...
+
+                Notes:
+                - If the section content is missing or vague, state that clearly and recommend precise content to add.
+                - Be specific and actionable. Avoid generic advice.
+                """
+
+# Per-section prompts are split into a shared prefix (identical for every section of a run) and a short
+# per-section suffix. OpenAI caches prompt prefixes of 1024+ tokens, so sections after the first are billed
+# and processed at the cached rate for everything up to the suffix.
+def build_section_brainstorm_prefix(user_research_profile, funding_call):
+    """
+    funding_call: dict with funding_agency, scheme_type, thrust_areas, eligibility.
+    """
+    return f"""You are a critical grant evaluator. You will be given one section of a research proposal at a time, after the shared context below.
+
+--- Researcher Profile ---
+{user_research_profile}
+
+--- Funding Call Details ---
+Funding Agency: {funding_call.get('funding_agency', '')}
+Scheme Type: {funding_call.get('scheme_type', '')}
+Thrust Areas: {funding_call.get('thrust_areas', '')}
+Eligibility: {funding_call.get('eligibility', '')}
+
+--- Instructions for AI ---
+For the section given at the end, provide a **highly critical and actionable** analysis in exactly this structure:
+**[Section Title]**
+**Strengths**
+- 2-3 strengths linked to call priorities or researcher's contributions
+**Weaknesses**
+- 2-3 critical weaknesses or gaps
+**Recommendations**
+- 2-3 specific actions to fix weaknesses and improve competitiveness
+If the section content is empty or vague, say so and list exact content to add.
+"""
+
+def build_section_brainstorm_suffix(section_title, section_content):
+    return f"""
+--- Specific Proposal Section for Analysis ---
+Section Title: {section_title}
+Section Content:
+{section_content}
+"""
+
+def section_analysis_key(section_title, section_content, context_hash, model_name=SELECTED_MODEL, summary_budget=None):
+    """
+    Identity of one per-section brainstorm analysis: the section's raw content (as split by
+    split_proposal_into_sections), the shared prompt prefix and the model. summary_budget is passed only for a
+    section that is over budget and gets summarized, so editing another section never invalidates this one.
+    Returns (analysis_key, content_hash).
+    """
+    content_hash = hashlib.sha256(section_content.encode("utf-8")).hexdigest()
+    payload = json.dumps([model_name, context_hash, section_title, content_hash] + ([summary_budget] if summary_budget is not None else []))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest(), content_hash
+
+def get_section_analysis(analysis_key) -> Optional[str]:
+    try:
+        with sqlite3.connect(DATABASE_FILE) as conn:
+            row = conn.execute("SELECT analysis FROM section_analyses WHERE analysis_key = ?", (analysis_key,)).fetchone()
+            return row[0] if row else None
+    except sqlite3.Error:
+        traceback.print_exc()
+        return None
+
+def store_section_analysis(analysis_key, section_title, content_hash, context_hash, analysis, model_name=SELECTED_MODEL):
+    try:
+        with sqlite3.connect(DATABASE_FILE) as conn:
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO section_analyses
+                    (analysis_key, section_title, content_hash, context_hash, model, analysis, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                (analysis_key, section_title, content_hash, context_hash, model_name, analysis, time.time()),
+            )
+    except sqlite3.Error:
+        traceback.print_exc()
+
+def build_section_improvement_prefix(funding_call, user_profile, brainstorm_report, improvement_instruction):
+    """
+    funding_call: dict with funding_agency, scheme_type, thrust_areas, eligibility.
+    """
+    return f"""
+You are an expert grant proposal writer. Your task is to improve one proposal section, given at the end, based on brainstorming feedback.
+
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+CONTEXT
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+Funding Agency: {funding_call.get('funding_agency', '')}
+Scheme Type: {funding_call.get('scheme_type', '')}
+Thrust Areas: {funding_call.get('thrust_areas', '')}
+Eligibility: {funding_call.get('eligibility', '')}
+
+Researcher Profile (Summarized):
+{user_profile}
+
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+BRAINSTORMING FEEDBACK (Full Report):
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+{brainstorm_report}
+
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+IMPROVEMENT INSTRUCTIONS
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+Improvement Level: {improvement_instruction}
+
+Your task:
+1. Carefully review the original section given below
+2. Identify relevant weaknesses and recommendations from the brainstorming report for THIS section
+3. Generate an IMPROVED version that:
+   - Addresses all identified weaknesses
+   - Implements the recommendations
+   - Maintains alignment with funding agency priorities
+   - Preserves the researcher's voice and authentic expertise
+   - Uses clear, compelling, professional language
+   - Includes specific details, metrics, and evidence where possible
+
+CRITICAL RULES:
+- Write ONLY the improved section content (no meta-commentary)
+- Do NOT include section headers or labels
+- Do NOT write "Here is the improved section" or similar phrases
+- If the original section was empty, create comprehensive content based on recommendations
+- Maintain appropriate length for this section type
+- Ensure coherence with other proposal sections
+"""
+
+def build_section_improvement_suffix(section_title, original_section_content):
+    return f"""
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+SECTION TO IMPROVE: "{section_title}"
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+ORIGINAL CONTENT:
+{original_section_content if original_section_content else "[SECTION IS EMPTY OR MISSING]"}
+
+OUTPUT: Write the improved "{section_title}" section content directly below:
+"""
+
+def split_proposal_into_sections(full_proposal_draft, template_sections_str):
+    sections = {}
+    template_section_titles = [line.strip() for line in template_sections_str.split('\n') if line.strip()]
+
+    # Use a regex to find sections. This assumes section titles are typically at the start of a line and followed by content.
+    # It also tries to handle numbered or bulleted sections.
+    # This is a heuristic and might need adjustment based on typical proposal formats.
     
     
     # Pattern to match section titles (e.g., 1. Introduction, 2. Background, 2.1. Sub-section)
@@ -1234,6 +3436,34 @@ def init_dbs():
         if "duplicate column name" not in str(e):
             raise
 
+    # Alignment results written back by batch runs
+    for column_sql in (
+        "ALTER TABLE generated_opportunities ADD COLUMN alignment_report TEXT;",
+        "ALTER TABLE generated_opportunities ADD COLUMN alignment_score FLOAT;",
+    ):
+        try:
+            c.execute(column_sql)
+        except sqlite3.OperationalError as e:
+            if "duplicate column name" not in str(e):
+                raise
+
+    # Offline batch jobs (see submit_batch_job / poll_batch_job)
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS batch_jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            created_at TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            backend TEXT NOT NULL,
+            batch_id TEXT,
+            status TEXT NOT NULL,
+            input_path TEXT NOT NULL,
+            output_path TEXT,
+            request_count INTEGER DEFAULT 0,
+            applied_count INTEGER DEFAULT 0,
+            error TEXT
+        )
+    ''')
+
     # User Research Profiles table (new for storing user profiles independently)
     c.execute('''
         CREATE TABLE IF NOT EXISTS user_profiles (
@@ -1244,6 +3474,148 @@ def init_dbs():
         )
     ''')
 
+    # Persistent LLM response cache (see llm_cache_get / llm_cache_put)
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS llm_response_cache (
+            cache_key TEXT PRIMARY KEY,
+            model TEXT NOT NULL,
+            prompt_hash TEXT NOT NULL,
+            max_tokens INTEGER,
+            response_text TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            last_accessed REAL NOT NULL,
+            hit_count INTEGER DEFAULT 0
+        )
+    ''')
+    c.execute('''
+        CREATE INDEX IF NOT EXISTS idx_llm_response_cache_last_accessed ON llm_response_cache (last_accessed)
+    ''')
+
+    # LLM call ledger (one row per generate/stream call, including cache hits)
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS llm_call_ledger (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            created_at REAL NOT NULL,
+            feature TEXT,
+            model TEXT,
+            prompt_tokens INTEGER DEFAULT 0,
+            completion_tokens INTEGER DEFAULT 0,
+            latency_ms INTEGER,
+            retries INTEGER DEFAULT 0,
+            cache_hit INTEGER DEFAULT 0,
+            success INTEGER DEFAULT 1,
+            streamed INTEGER DEFAULT 0
+        )
+    ''')
+    c.execute('''
+        CREATE INDEX IF NOT EXISTS idx_llm_call_ledger_created_at ON llm_call_ledger (created_at)
+    ''')
+    try:
+        c.execute('''
+            ALTER TABLE llm_call_ledger ADD COLUMN cached_prompt_tokens INTEGER DEFAULT 0;
+        ''')
+    except sqlite3.OperationalError as e:
+        if "duplicate column name" not in str(e):
+            raise
+    try:
+        c.execute('''
+            ALTER TABLE llm_call_ledger ADD COLUMN coalesced INTEGER DEFAULT 0;
+        ''')
+    except sqlite3.OperationalError as e:
+        if "duplicate column name" not in str(e):
+            raise
+    for ledger_column in ("hedged", "degraded", "hedge_discarded"):
+        try:
+            c.execute(f"ALTER TABLE llm_call_ledger ADD COLUMN {ledger_column} INTEGER DEFAULT 0")
+        except sqlite3.OperationalError as e:
+            if "duplicate column name" not in str(e):
+                raise
+
+    # Summaries keyed by content hash (whole-text summaries and map-reduce chunk summaries)
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS summary_cache (
+            content_hash TEXT NOT NULL,
+            max_tokens INTEGER NOT NULL,
+            model TEXT NOT NULL,
+            summary TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            PRIMARY KEY (content_hash, max_tokens, model)
+        )
+    ''')
+
+    # Local opportunity store fed by the background ingestion worker
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS opportunities (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            opportunity_key TEXT NOT NULL UNIQUE,
+            source TEXT NOT NULL,
+            scheme_name TEXT NOT NULL,
+            funding_agency TEXT,
+            last_date_submission TEXT,
+            deadline_date TEXT,
+            description TEXT,
+            source_url TEXT,
+            full_text_content TEXT,
+            first_seen REAL NOT NULL,
+            last_seen REAL NOT NULL
+        )
+    ''')
+    c.execute('''
+        CREATE INDEX IF NOT EXISTS idx_opportunities_last_seen ON opportunities (last_seen)
+    ''')
+    c.execute('''
+        CREATE INDEX IF NOT EXISTS idx_opportunities_deadline_date ON opportunities (deadline_date)
+    ''')
+    c.execute('''
+        CREATE INDEX IF NOT EXISTS idx_opportunities_source ON opportunities (source)
+    ''')
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS ingestion_runs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            started_at REAL NOT NULL,
+            finished_at REAL,
+            items INTEGER DEFAULT 0,
+            errors TEXT
+        )
+    ''')
+
+    # Per-source crawl bookkeeping for the scheduler (each source has its own refresh interval)
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS source_fetch_state (
+            name TEXT PRIMARY KEY,
+            last_attempt_at REAL NOT NULL,
+            last_success_at REAL,
+            items INTEGER DEFAULT 0,
+            last_error TEXT
+        )
+    ''')
+
+    # URL -> deadline lookups shared across sessions (deadline NULL = negative entry)
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS deadline_cache (
+            url TEXT PRIMARY KEY,
+            deadline TEXT,
+            status TEXT NOT NULL,
+            content_hash TEXT,
+            failures INTEGER DEFAULT 0,
+            fetched_at REAL NOT NULL,
+            expires_at REAL NOT NULL
+        )
+    ''')
+
+    # Per-section brainstorm analyses, keyed by section content and call context, for incremental re-runs
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS section_analyses (
+            analysis_key TEXT PRIMARY KEY,
+            section_title TEXT NOT NULL,
+            content_hash TEXT NOT NULL,
+            context_hash TEXT NOT NULL,
+            model TEXT NOT NULL,
+            analysis TEXT NOT NULL,
+            created_at REAL NOT NULL
+        )
+    ''')
+
     conn.commit()
     conn.close()
 
@@ -1353,18 +3725,536 @@ def parse_brainstorm_report(report_text):
 def load_user_profiles():
     with sqlite3.connect(DATABASE_FILE) as conn:
         conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        cursor.execute("SELECT profile_name, research_background FROM user_profiles ORDER BY timestamp DESC")
-        profiles = cursor.fetchall()
-        return {profile['profile_name']: profile['research_background'] for profile in profiles}
+        cursor = conn.cursor()
+        cursor.execute("SELECT profile_name, research_background FROM user_profiles ORDER BY timestamp DESC")
+        profiles = cursor.fetchall()
+        return {profile['profile_name']: profile['research_background'] for profile in profiles}
+
+# --- Helper to delete a user profile ---
+def delete_user_profile(profile_name):
+    with sqlite3.connect(DATABASE_FILE) as conn:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM user_profiles WHERE profile_name = ?", (profile_name,))
+        conn.commit()
+    st.success(f"Research profile '{profile_name}' deleted successfully!")
+
+# --- Offline Batch Execution ---
+BATCH_JOBS_DIR = BASE_DIR / "batch_jobs"
+BATCH_TERMINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+def _batch_request_line(custom_id, prompt, task):
+    profile = get_task_profile(task)
+    return {
+        "custom_id": custom_id,
+        "method": "POST",
+        "url": "/v1/chat/completions",
+        "body": {
+            "model": profile["model"],
+            "messages": [{"role": "user", "content": prompt}],
+            "max_tokens": profile["max_tokens"],
+            "temperature": profile["temperature"],
+        },
+    }
+
+def _fit_parts_without_llm(parts, fixed_text, task):
+    # Batch prompts are built offline, so overflowing parts are truncated instead of summarized
+    profile = get_task_profile(task)
+    model_name = profile["model"]
+    budget = prompt_token_budget(model_name, fixed_text, profile["max_tokens"])
+    allocations = allocate_token_budget({name: count_tokens(text, model_name) for name, text in parts.items()}, budget)
+    return {name: truncate_to_tokens(text, allocations[name], model_name) for name, text in parts.items()}
+
+def build_brainstorm_batch_requests(proposals):
+    """
+    One single-pass brainstorm request per saved proposal (custom_id "proposal:<id>").
+    """
+    requests_out = []
+    for p in proposals:
+        template_section_titles = [line.strip() for line in (p.get('template_sections') or '').split('\n') if line.strip()]
+        if not (p.get('full_proposal_content') and template_section_titles):
+            continue
+        funding_call = {
+            "funding_agency": p.get('funding_agency') or '',
+            "scheme_type": p.get('scheme_type') or '',
+            "thrust_areas": p.get('thrust_areas') or '',
+            "eligibility": p.get('eligibility') or '',
+        }
+        fitted = _fit_parts_without_llm(
+            {"profile": p.get('user_research_background') or '', "draft": p['full_proposal_content']},
+            build_single_pass_brainstorm_prompt("", funding_call, "", template_section_titles),
+            "brainstorm_report",
+        )
+        prompt = build_single_pass_brainstorm_prompt(fitted["profile"], funding_call, fitted["draft"], template_section_titles)
+        requests_out.append(_batch_request_line(f"proposal:{p['id']}", prompt, "brainstorm_report"))
+    return requests_out
+
+def build_alignment_batch_requests(user_research_profile, opportunities):
+    """
+    One alignment request per saved opportunity (custom_id "opportunity:<id>") for a single research profile.
+    """
+    requests_out = []
+    for opp in opportunities:
+        fitted = _fit_parts_without_llm(
+            {"profile": user_research_profile, "description": opp.get('description') or ''},
+            build_alignment_prompt("", {**opp, "description": ""}),
+            "alignment",
+        )
+        prompt = build_alignment_prompt(fitted["profile"], {**opp, "description": fitted["description"]})
+        requests_out.append(_batch_request_line(f"opportunity:{opp['id']}", prompt, "alignment"))
+    return requests_out
+
+def _local_batch_responder(body):
+    """
+    Deterministic offline response used by LocalBatchBackend.
+    """
+    prompt = body["messages"][-1]["content"]
+    digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+    return f"[Local batch stand-in response for {body.get('model')}; prompt {digest[:12]}, {count_tokens(prompt)} tokens]"
+
+class OpenAIBatchBackend:
+    """
+    Submits the JSONL through the OpenAI Batch API (24h completion window, discounted pricing).
+    """
+    name = "openai"
+
+    def submit(self, input_path):
+        if openai_client is None:
+            raise RuntimeError("OPENAI_API_KEY is missing.")
+        with open(input_path, "rb") as f:
+            uploaded = openai_client.files.create(file=f, purpose="batch")
+        batch = openai_client.batches.create(
+            input_file_id=uploaded.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h",
+        )
+        return batch.id
+
+    def poll(self, job):
+        """
+        Returns (status, output_text or None, error_text or None). error_text is the JSONL error file
+        (requests that failed) plus any batch-level validation errors.
+        """
+        batch = openai_client.batches.retrieve(job['batch_id'])
+        output_text = error_text = None
+        if batch.status == "completed" and batch.output_file_id:
+            output_text = openai_client.files.content(batch.output_file_id).text
+        if batch.status in BATCH_TERMINAL_STATUSES:
+            error_parts = []
+            if getattr(batch, "error_file_id", None):
+                error_parts.append(openai_client.files.content(batch.error_file_id).text)
+            for err in getattr(getattr(batch, "errors", None), "data", None) or []:
+                # Batch-level errors (e.g. an invalid input file) have no custom_id
+                error_parts.append(json.dumps({"custom_id": None, "error": {"code": err.code, "message": err.message}}))
+            error_text = "\n".join(part for part in error_parts if part.strip()) or None
+        return batch.status, output_text, error_text
+
+class LocalBatchBackend:
+    """
+    Offline stand-in with the same interface: requests are answered by `responder` when the job is polled,
+    and the output uses the Batch API's JSONL result format.
+    """
+    name = "local"
+
+    def __init__(self, responder=None):
+        self.responder = responder or _local_batch_responder
+
+    def submit(self, input_path):
+        return f"local_{uuid.uuid4().hex[:12]}"
+
+    def poll(self, job):
+        output_lines = []
+        with open(job['input_path'], "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                request_line = json.loads(line)
+                try:
+                    content = self.responder(request_line["body"])
+                    result = {
+                        "id": f"batch_req_{uuid.uuid4().hex[:12]}",
+                        "custom_id": request_line["custom_id"],
+                        "response": {
+                            "status_code": 200,
+                            "body": {"choices": [{"index": 0, "message": {"role": "assistant", "content": content}}]},
+                        },
+                        "error": None,
+                    }
+                except Exception as e:
+                    result = {"custom_id": request_line["custom_id"], "response": None, "error": {"message": str(e)}}
+                output_lines.append(json.dumps(result, ensure_ascii=False))
+        # Failed requests stay in the output, as in the Batch API's combined format
+        return "completed", "\n".join(output_lines), None
+
+BATCH_BACKENDS = {
+    "openai": OpenAIBatchBackend,
+    "local": LocalBatchBackend,
+}
+
+def submit_batch_job(kind, batch_requests, backend_name="openai"):
+    """
+    Write the requests as JSONL, submit them through the chosen backend and record the job. Returns the job id.
+    """
+    BATCH_JOBS_DIR.mkdir(parents=True, exist_ok=True)
+    input_path = BATCH_JOBS_DIR / f"{kind}_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}.jsonl"
+    with open(input_path, "w", encoding="utf-8") as f:
+        for request_line in batch_requests:
+            f.write(json.dumps(request_line, ensure_ascii=False) + "\n")
+
+    batch_id = BATCH_BACKENDS[backend_name]().submit(str(input_path))
+    with sqlite3.connect(DATABASE_FILE) as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "INSERT INTO batch_jobs (created_at, kind, backend, batch_id, status, input_path, request_count) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (datetime.now().strftime("%Y-%m-%d %H:%M:%S"), kind, backend_name, batch_id, "submitted", str(input_path), len(batch_requests)),
+        )
+        conn.commit()
+        return cursor.lastrowid
+
+def apply_batch_results(output_text):
+    """
+    Write completed batch results back into proposals / generated_opportunities. Returns the number applied.
+    """
+    applied = 0
+    with sqlite3.connect(DATABASE_FILE) as conn:
+        for line in output_text.splitlines():
+            if not line.strip():
+                continue
+            result = json.loads(line)
+            response = result.get("response") or {}
+            if result.get("error") or response.get("status_code") != 200:
+                continue
+            content = response["body"]["choices"][0]["message"]["content"]
+            target, _, row_id = result["custom_id"].partition(":")
+            if target == "proposal":
+                conn.execute("UPDATE proposals SET brainstorm_analysis_report = ? WHERE id = ?", (content, int(row_id)))
+            elif target == "opportunity":
+                conn.execute(
+                    "UPDATE generated_opportunities SET alignment_report = ?, alignment_score = ? WHERE id = ?",
+                    (content, extract_alignment_score(content), int(row_id)),
+                )
+            else:
+                continue
+            applied += 1
+        conn.commit()
+    return applied
+
+def summarize_batch_errors(*texts):
+    """
+    One-line summary of the failed requests in batch result/error JSONL texts, or None if nothing failed:
+    the failure count, the first error message and the failed custom_ids (first 20).
+    """
+    failed_ids, messages = [], []
+    for text in texts:
+        for line in (text or "").splitlines():
+            if not line.strip():
+                continue
+            result = json.loads(line)
+            response = result.get("response") or {}
+            if not result.get("error") and response.get("status_code") == 200:
+                continue
+            error = result.get("error") or (response.get("body") or {}).get("error") or {}
+            messages.append(error.get("message") or f"HTTP {response.get('status_code')}")
+            if result.get("custom_id"):
+                failed_ids.append(result["custom_id"])
+    if not messages:
+        return None
+    summary = f"{len(messages)} failed: {messages[0]}"
+    if failed_ids:
+        summary += f" | custom_ids: {', '.join(failed_ids[:20])}{' ...' if len(failed_ids) > 20 else ''}"
+    return summary
+
+def load_batch_jobs():
+    with sqlite3.connect(DATABASE_FILE) as conn:
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM batch_jobs ORDER BY id DESC")
+        return [dict(row) for row in cursor.fetchall()]
+
+def poll_batch_job(job):
+    """
+    Check a job's status; when it completes, save the raw output and apply the results. Returns the new status.
+    """
+    if job['status'] in BATCH_TERMINAL_STATUSES:
+        return job['status']
+    status, output_text, error_text = BATCH_BACKENDS[job['backend']]().poll(job)
+    output_path, applied = job.get('output_path'), job.get('applied_count') or 0
+    if status == "completed" and output_text is not None:
+        output_path = str(Path(job['input_path']).with_suffix(".output.jsonl"))
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.write(output_text)
+        applied = apply_batch_results(output_text)
+    if error_text is not None:
+        with open(Path(job['input_path']).with_suffix(".errors.jsonl"), "w", encoding="utf-8") as f:
+            f.write(error_text)
+    error = summarize_batch_errors(output_text, error_text) if status in BATCH_TERMINAL_STATUSES else job.get('error')
+    if status in BATCH_TERMINAL_STATUSES and status != "completed" and not error:
+        error = f"Batch {status}"
+    with sqlite3.connect(DATABASE_FILE) as conn:
+        conn.execute(
+            "UPDATE batch_jobs SET status = ?, output_path = ?, applied_count = ?, error = ? WHERE id = ?",
+            (status, output_path, applied, error, job['id']),
+        )
+        conn.commit()
+    return status
+
+# --- Opportunity Store & Background Ingestion ---
+# A worker thread (started once per server) or `python app.py ingest` crawls each registry source when its
+# refresh interval is due, enriches deadlines and upserts everything into the opportunities table; Grant Finder queries that table.
+OPPORTUNITY_INGEST_ENABLED = os.getenv("OPPORTUNITY_INGEST_ENABLED", "1").strip().lower() in ("1", "true", "yes")
+OPPORTUNITY_INGEST_INTERVAL_SECONDS = int(os.getenv("OPPORTUNITY_INGEST_INTERVAL_SECONDS", str(6 * 3600)))  # Default refresh_interval_s
+OPPORTUNITY_INGEST_DEADLINE_CHECKS = int(os.getenv("OPPORTUNITY_INGEST_DEADLINE_CHECKS", "60"))
+OPPORTUNITY_STALE_SECONDS = 14 * 24 * 3600  # Rows not seen by any crawl for this long are hidden from Grant Finder
+OPPORTUNITY_LOAD_LIMIT = int(os.getenv("OPPORTUNITY_LOAD_LIMIT", "2000"))  # Most recently seen rows Grant Finder ranks
+
+def _opportunity_key(source, opp):
+    identity = f"{source}|{opp.get('source_url') or ''}|{(opp.get('scheme_name') or '').strip().lower()}"
+    return hashlib.sha256(identity.encode("utf-8")).hexdigest()
+
+def upsert_opportunities(source, opportunities, seen_at=None):
+    """
+    Insert or refresh opportunities from one source. A known deadline is never overwritten by "N/A".
+    """
+    seen_at = seen_at or time.time()
+    rows = []
+    for opp in opportunities:
+        deadline = (opp.get("last_date_submission") or "N/A").strip() or "N/A"
+        if deadline == DEADLINE_PENDING:
+            deadline = "N/A"
+        parsed = _parse_deadline_to_date(deadline)
+        rows.append(
+            (
+                _opportunity_key(source, opp),
+                source,
+                opp.get("scheme_name") or "N/A",
+                opp.get("funding_agency") or "N/A",
+                deadline,
+                parsed.date().isoformat() if parsed else None,
+                opp.get("description") or "N/A",
+                opp.get("source_url") or "",
+                opp.get("full_text_content") or "",
+                seen_at,
+                seen_at,
+            )
+        )
+    with sqlite3.connect(DATABASE_FILE) as conn:
+        conn.executemany(
+            """
+            INSERT INTO opportunities
+                (opportunity_key, source, scheme_name, funding_agency, last_date_submission, deadline_date,
+                 description, source_url, full_text_content, first_seen, last_seen)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(opportunity_key) DO UPDATE SET
+                scheme_name = excluded.scheme_name,
+                funding_agency = excluded.funding_agency,
+                last_date_submission = CASE WHEN excluded.last_date_submission != 'N/A'
+                    THEN excluded.last_date_submission ELSE opportunities.last_date_submission END,
+                deadline_date = COALESCE(excluded.deadline_date, opportunities.deadline_date),
+                description = excluded.description,
+                source_url = excluded.source_url,
+                full_text_content = excluded.full_text_content,
+                last_seen = excluded.last_seen
+            """,
+            rows,
+        )
+        conn.commit()
+    return len(rows)
+
+def _known_deadlines(source):
+    with sqlite3.connect(DATABASE_FILE) as conn:
+        cursor = conn.execute(
+            "SELECT opportunity_key, last_date_submission FROM opportunities WHERE source = ? AND last_date_submission != 'N/A'",
+            (source,),
+        )
+        return dict(cursor.fetchall())
+
+def ingest_opportunities_once(sources=None):
+    """
+    One crawl: fetch sources concurrently (default: every enabled registry source), fill deadlines
+    (reusing those already stored), upsert. Returns {"items": int, "errors": {source: message}}.
+    """
+    sources = sources if sources is not None else load_grant_sources()
+    started = time.time()
+    with sqlite3.connect(DATABASE_FILE) as conn:
+        run_id = conn.execute("INSERT INTO ingestion_runs (started_at) VALUES (?)", (started,)).lastrowid
+        conn.commit()
+
+    results = fetch_grant_sources_concurrently(sources)
+    total, errors = 0, {}
+    for name, result in results.items():
+        if result["error"] is not None:
+            errors[name] = str(result["error"])
+        record_source_fetch(name, started, len(result["items"]), errors.get(name))
+        items = result["items"]
+        if not items:
+            continue
+        known = _known_deadlines(name)
+        for opp in items:
+            if (opp.get("last_date_submission") or "N/A") == "N/A" and _opportunity_key(name, opp) in known:
+                opp["last_date_submission"] = known[_opportunity_key(name, opp)]
+        enrich_opportunities_with_deadlines_only(items, max_to_check=OPPORTUNITY_INGEST_DEADLINE_CHECKS, budget_s=None)
+        total += upsert_opportunities(name, items, seen_at=started)
+
+    with sqlite3.connect(DATABASE_FILE) as conn:
+        conn.execute(
+            "UPDATE ingestion_runs SET finished_at = ?, items = ?, errors = ? WHERE id = ?",
+            (time.time(), total, json.dumps(errors) if errors else None, run_id),
+        )
+        conn.commit()
+    return {"items": total, "errors": errors}
+
+def record_source_fetch(name, attempted_at, items, error=None):
+    with sqlite3.connect(DATABASE_FILE) as conn:
+        conn.execute(
+            """
+            INSERT INTO source_fetch_state (name, last_attempt_at, last_success_at, items, last_error)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(name) DO UPDATE SET
+                last_attempt_at = excluded.last_attempt_at,
+                last_success_at = COALESCE(excluded.last_success_at, source_fetch_state.last_success_at),
+                items = excluded.items,
+                last_error = excluded.last_error
+            """,
+            (name, attempted_at, None if error else attempted_at, items, error),
+        )
+        conn.commit()
+
+def load_source_fetch_state():
+    with sqlite3.connect(DATABASE_FILE) as conn:
+        conn.row_factory = sqlite3.Row
+        return {row["name"]: dict(row) for row in conn.execute("SELECT * FROM source_fetch_state")}
+
+def due_grant_sources(now=None):
+    """
+    (sources whose refresh_interval_s has elapsed, seconds until the next one is due). A source whose last crawl
+    failed is retried after DEADLINE_ERROR_RETRY_SECONDS at most; one never crawled counts from the last full run.
+    """
+    now = now or time.time()
+    state = load_source_fetch_state()
+    last_run = last_ingestion_run()
+    due, next_due_in = [], OPPORTUNITY_SCHEDULER_TICK_SECONDS
+    for source in load_grant_sources():
+        row = state.get(source["name"])
+        interval = source["refresh_interval_s"]
+        if row and row["last_error"]:
+            interval = min(interval, DEADLINE_ERROR_RETRY_SECONDS)
+        last_attempt = row["last_attempt_at"] if row else (last_run["started_at"] if last_run else None)
+        due_at = now if last_attempt is None else last_attempt + interval
+        if due_at <= now:
+            due.append(source)
+        else:
+            next_due_in = min(next_due_in, due_at - now)
+    return due, next_due_in
+
+def load_stored_opportunities(max_age_seconds=OPPORTUNITY_STALE_SECONDS, limit=OPPORTUNITY_LOAD_LIMIT):
+    """
+    Opportunities seen by a crawl within max_age_seconds (newest first, at most limit), with only the columns
+    the Grant Finder renders; full_text_content is fetched on demand with load_opportunity_full_text.
+    """
+    with sqlite3.connect(DATABASE_FILE) as conn:
+        conn.row_factory = sqlite3.Row
+        cursor = conn.execute(
+            """
+            SELECT opportunity_key, source, scheme_name, funding_agency, last_date_submission, description, source_url
+            FROM opportunities
+            WHERE last_seen >= ?
+            ORDER BY last_seen DESC, id
+            LIMIT ?
+            """,
+            (time.time() - max_age_seconds, limit),
+        )
+        return [dict(row) for row in cursor.fetchall()]
 
-# --- Helper to delete a user profile ---
-def delete_user_profile(profile_name):
+def load_opportunity_full_text(opportunity_key):
     with sqlite3.connect(DATABASE_FILE) as conn:
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM user_profiles WHERE profile_name = ?", (profile_name,))
-        conn.commit()
-    st.success(f"Research profile '{profile_name}' deleted successfully!")
+        row = conn.execute("SELECT full_text_content FROM opportunities WHERE opportunity_key = ?", (opportunity_key,)).fetchone()
+        return row[0] if row else ""
+
+def last_ingestion_run():
+    with sqlite3.connect(DATABASE_FILE) as conn:
+        conn.row_factory = sqlite3.Row
+        row = conn.execute(
+            "SELECT * FROM ingestion_runs WHERE finished_at IS NOT NULL ORDER BY finished_at DESC LIMIT 1"
+        ).fetchone()
+        return dict(row) if row else None
+
+class OpportunityIngestionWorker:
+    """
+    Daemon thread crawling each registry source as it falls due (see due_grant_sources);
+    trigger() crawls every source immediately, stop() ends the loop after the current run.
+    """
+    def __init__(self):
+        self.running = False
+        self.last_error = None
+        self._refresh_all = False
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="opportunity-ingestion", daemon=True)
+        self._thread.ingestion_worker = self  # Lets start_ingestion_worker find it again after a cache clear
+        self._thread.start()
+
+    @property
+    def alive(self):
+        return self._thread.is_alive() and not self._stopped.is_set()
+
+    def trigger(self):
+        self._refresh_all = True
+        self._wake.set()
+
+    def stop(self, timeout=None):
+        self._stopped.set()
+        self._wake.set()
+        self._thread.join(timeout)
+
+    def _loop(self):
+        while not self._stopped.is_set():
+            due, next_due_in = due_grant_sources()
+            if self._refresh_all:
+                self._refresh_all = False
+                due = load_grant_sources()
+            elif not due:
+                self._wake.wait(timeout=next_due_in)
+                self._wake.clear()
+                continue
+            self._wake.clear()
+            self.running = True
+            try:
+                ingest_opportunities_once(due)
+                self.last_error = None
+            except Exception as e:
+                self.last_error = e
+                traceback.print_exc()
+                self._wake.wait(timeout=60)  # Back off before retrying a crashed run
+            finally:
+                self.running = False
+
+@st.cache_resource
+def start_ingestion_worker():
+    # One worker per server process, shared by all sessions. "Clear cache" empties cache_resource too, so adopt
+    # the thread that is already crawling rather than starting a second one beside it
+    for thread in threading.enumerate():
+        worker = getattr(thread, "ingestion_worker", None)
+        if worker is not None and worker.alive:
+            return worker
+    return OpportunityIngestionWorker()
+
+def run_ingestion_cli(argv):
+    """
+    Standalone ingestion process (no Streamlit UI). Loops crawling sources as they fall due;
+    with --once, crawls every source a single time. Returns the process exit code.
+    """
+    init_dbs()
+    once = "--once" in argv
+    while True:
+        due_sources, next_due_in = (load_grant_sources(), 0) if once else due_grant_sources()
+        if due_sources:
+            ingest_summary = ingest_opportunities_once(due_sources)
+            print(
+                f"Ingested {ingest_summary['items']} opportunities from {', '.join(s['name'] for s in due_sources)}; "
+                f"errors: {ingest_summary['errors'] or 'none'}"
+            )
+        if once:
+            return 1 if due_sources and ingest_summary["errors"] and not ingest_summary["items"] else 0
+        time.sleep(next_due_in)
 
 @st.cache_resource
 def load_taxonomy(taxonomy_path: Path, file_mtime: Optional[float]):
@@ -1375,29 +4265,17 @@ def load_taxonomy(taxonomy_path: Path, file_mtime: Optional[float]):
     return DEFAULT_TAXONOMY
 
 def find_taxonomy_path() -> Path:
-    candidates = []
-    configured_path = os.getenv("TAXONOMY_PATH") or ""
-    if not configured_path:
-        try:
-            configured_path = st.secrets.get("TAXONOMY_PATH", "")
-        except Exception:
-            configured_path = ""
-    if configured_path:
-        candidates.append(Path(configured_path))
-    for base_dir in (BASE_DIR, Path.cwd()):
-        candidates.append(base_dir / "taxonomy.json")
-        candidates.append(base_dir.parent / "taxonomy.json")
-        candidates.append(base_dir.parent.parent / "taxonomy.json")
-    for candidate in candidates:
-        if candidate.exists():
-            return candidate
-    return candidates[0] if candidates else (BASE_DIR / "taxonomy.json")
+    return _find_config_file("taxonomy.json", "TAXONOMY_PATH")
 
 taxonomy_path = find_taxonomy_path()
 
 taxonomy_mtime = taxonomy_path.stat().st_mtime if taxonomy_path.exists() else None
 taxonomy = load_taxonomy(taxonomy_path, taxonomy_mtime)
 
+# `python app.py ingest [--once]` runs the ingestion entrypoint instead of the Streamlit page below
+if __name__ == "__main__" and sys.argv[1:2] == ["ingest"]:
+    sys.exit(run_ingestion_cli(sys.argv[2:]))
+
 # --- Page Config ---
 st.set_page_config(page_title="", layout="wide")
 
@@ -1732,6 +4610,8 @@ if 'template_upload_error' not in st.session_state:
 
 # Initialize databases on startup
 init_dbs()
+if OPPORTUNITY_INGEST_ENABLED:
+    start_ingestion_worker()
 
 # --- Navigation Functions ---
 def nav_to(view_name):
@@ -1748,7 +4628,8 @@ sidebar_items = [
     {"label": "Brainstorm Room", "icon": "", "view": "brainstorm_room"},
     {"label": "Draft Final Proposal", "icon": "✍️", "view": "draft_final"},
     {"label": "My Drafts & Submissions", "icon": "", "view": "my_drafts"},
-    {"label": "Export & Share Center", "icon": "", "view": "export_share"}
+    {"label": "Export & Share Center", "icon": "", "view": "export_share"},
+    {"label": "Admin Console", "icon": "", "view": "admin"}
 ]
 
 for item in sidebar_items:
@@ -1773,6 +4654,19 @@ for item in sidebar_items:
             </style>
         """, unsafe_allow_html=True)
 
+# --- AI Response Cache Controls ---
+st.sidebar.markdown("---")
+st.sidebar.checkbox(
+    "Bypass AI response cache",
+    key="llm_cache_bypass",
+    help="Always call the model, even if an identical prompt was answered recently.",
+)
+_llm_cache_stats = get_llm_cache_stats()
+st.sidebar.caption(f"AI cache: {_llm_cache_stats['hits']} hits / {_llm_cache_stats['misses']} misses")
+if st.sidebar.button("Clear AI response cache", key="llm_cache_clear_btn"):
+    clear_llm_cache()
+    st.sidebar.success("AI response cache cleared.")
+
 # --- Main Content Area ---
 st.header("Idea2Impact Studio")
 
@@ -2117,7 +5011,7 @@ elif st.session_state['current_main_view'] == 'proposal_generator':
                 {funding_call_text}
                 """
                 with st.spinner("Generating template sections..."):
-                    template_response = generate_content_with_retry(SELECTED_MODEL, template_prompt)
+                    template_response = generate_for_task("template_extract", template_prompt)
                     if template_response:
                         st.session_state['template_sections_generated'] = template_response.text
                         st.session_state['final_template_sections'] = template_response.text # Update final sections too
@@ -2197,7 +5091,7 @@ elif st.session_state['current_main_view'] == 'proposal_generator':
                         7. Expected Outcomes
                         8. References
                         """
-                        analysis_response = generate_content_with_retry(SELECTED_MODEL, template_analysis_prompt)
+                        analysis_response = generate_for_task("template_extract", template_analysis_prompt)
                         if analysis_response and analysis_response.text:
                             sections_list = [line.strip() for line in analysis_response.text.split('\n') if line.strip()]
                             st.session_state['uploaded_template_sections_parsed'] = sections_list
@@ -2339,7 +5233,10 @@ elif st.session_state['current_main_view'] == 'proposal_generator':
             - The full proposal should be at least 1500 words, but ideally around 2000-3000 words for a substantial draft.
             """
             with st.spinner("Generating full proposal draft (this may take a few minutes for a comprehensive draft)..."):
-                full_proposal_response = generate_content_with_retry(SELECTED_MODEL, proposal_draft_prompt)
+                draft_stream_placeholder = st.empty()
+                full_proposal_response = stream_for_task("draft", proposal_draft_prompt, placeholder=draft_stream_placeholder)
+                # The saved draft is rendered under "Full Proposal Draft" below; drop the live preview
+                draft_stream_placeholder.empty()
                 if full_proposal_response:
                     st.session_state['full_proposal_draft'] = full_proposal_response.text
                     st.success("Full proposal draft generated!")
@@ -2481,6 +5378,21 @@ elif st.session_state['current_main_view'] == 'grant_finder':
         help="Shows only calls with a parsed deadline strictly after today (and not marked CLOSED).",
     )
 
+    # Opportunities come from the local store kept fresh by the ingestion worker; live crawling is the fallback
+    last_run = last_ingestion_run()
+    col_store, col_refresh = st.columns([3, 1])
+    with col_store:
+        if last_run:
+            minutes_ago = (time.time() - last_run['finished_at']) / 60
+            st.caption(f"Opportunity store last refreshed {minutes_ago:.0f} min ago ({last_run['items']} items).")
+        else:
+            st.caption("Opportunity store is empty; the first search crawls the sources live.")
+        live_fetch = st.checkbox("Fetch live from sources instead of the local store", value=False, key="gf_live_fetch")
+    with col_refresh:
+        if OPPORTUNITY_INGEST_ENABLED and st.button("Refresh store now"):
+            start_ingestion_worker().trigger()
+            st.info("Refresh started in the background.")
+
     # Use st.columns to place broad and specific domain selection side-by-side
     col_broad, col_specific = st.columns(2)
 
@@ -2504,46 +5416,60 @@ elif st.session_state['current_main_view'] == 'grant_finder':
             # Calculate minimum submission date (today + 15 days)
             min_submission_date = (datetime.now() + timedelta(days=15)).strftime("%Y-%m-%d")
 
-            st.info("Searching opportunities... This may take a moment.")
-            with st.spinner("Fetching opportunities from DST announcements, ANRF portal, Opportunity Sheet, and IndiaScienceAndTechnology..."):
-                dst_items, anrf_items, sheet_items, ist_items = [], [], [], []
-                dst_err, anrf_err, sheet_err, ist_err = None, None, None, None
-                try:
-                    dst_items = fetch_dst_announcements()
-                except Exception as e:
-                    dst_err = e
-                try:
-                    anrf_items = fetch_anrf_homepage()
-                except Exception as e:
-                    anrf_err = e
-                try:
-                    sheet_items = fetch_google_sheet_opportunities()
-                except Exception as e:
-                    sheet_err = e
-                try:
-                    ist_items = fetch_india_science_technology_latest()
-                except Exception as e:
-                    ist_err = e
+            grant_sources = load_grant_sources()
+            stored_opportunities = [] if live_fetch else load_stored_opportunities()
+            source_results = {}
+            if stored_opportunities:
+                merged = stored_opportunities
+            else:
+                st.info("Searching opportunities... This may take a moment.")
+                with st.spinner(f"Fetching opportunities from {', '.join(s['name'] for s in grant_sources)}..."):
+                    merged = []
+                    fetch_progress = st.empty()
+
+                    def on_source_fetched(name, result):
+                        # Merge each source as soon as it lands
+                        merged.extend(result["items"])
+                        fetch_progress.caption(f"{name}: {len(result['items'])} items in {result['elapsed']:.1f}s")
+
+                    source_results = fetch_grant_sources_concurrently(grant_sources, on_result=on_source_fetched)
+                    fetch_progress.empty()
+                    # Keep the store warm with what we just crawled
+                    for name, result in source_results.items():
+                        if result["items"]:
+                            upsert_opportunities(name, result["items"])
 
-            merged = (dst_items or []) + (anrf_items or []) + (sheet_items or []) + (ist_items or [])
             if merged:
-                st.caption(
-                    f"Sources fetched — DST: {len(dst_items or [])}, ANRF: {len(anrf_items or [])}, "
-                    f"Sheet: {len(sheet_items or [])}, IndiaS&T: {len(ist_items or [])}."
-                )
+                if stored_opportunities:
+                    st.caption(
+                        "Loaded from the local opportunity store — "
+                        + ", ".join(
+                            f"{s['name']}: {sum(1 for o in stored_opportunities if o['source'] == s['name'])}" for s in grant_sources
+                        )
+                        + "."
+                    )
+                else:
+                    st.caption(
+                        "Sources fetched — "
+                        + ", ".join(f"{name}: {len(result['items'])}" for name, result in source_results.items())
+                        + "."
+                    )
                 ranked = rank_opportunities_by_keywords(merged, selected_specific_areas, top_k=50)
                 ranked = filter_opportunities_by_keywords(ranked, selected_specific_areas)
-                # Try to read submission deadlines from the call links (best-effort)
-                with st.spinner("Reading Last Date of Submission from call links (best-effort)..."):
-                    ranked = enrich_opportunities_with_deadlines_only(ranked, max_to_check=30)
+                if not stored_opportunities:
+                    # Try to read submission deadlines from the call links (best-effort); stored rows were enriched at ingestion
+                    with st.spinner("Reading Last Date of Submission from call links (best-effort)..."):
+                        ranked = enrich_opportunities_with_deadlines_only(ranked, max_to_check=30)
                 if active_only:
                     # Debug counts to explain why zero results can happen
                     total = len(ranked)
                     parsed_deadlines = sum(1 for r in ranked if _parse_deadline_to_date((r.get("last_date_submission") or "").strip()))
-                    unknown_deadlines = sum(1 for r in ranked if not _parse_deadline_to_date((r.get("last_date_submission") or "").strip()))
+                    pending_deadlines = sum(1 for r in ranked if (r.get("last_date_submission") or "").strip() == DEADLINE_PENDING)
+                    unknown_deadlines = sum(1 for r in ranked if not _parse_deadline_to_date((r.get("last_date_submission") or "").strip())) - pending_deadlines
                     filtered = filter_active_open_calls(ranked, include_no_deadline=False)
                     st.caption(
-                        f"Active/Open filter: total {total}, parsed deadlines {parsed_deadlines}, unknown deadlines {unknown_deadlines}, active {len(filtered)}."
+                        f"Active/Open filter: total {total}, parsed deadlines {parsed_deadlines}, unknown deadlines {unknown_deadlines}, "
+                        f"pending lookups {pending_deadlines}, active {len(filtered)}."
                     )
                     ranked = filtered
                     if not ranked:
@@ -2553,12 +5479,7 @@ elif st.session_state['current_main_view'] == 'grant_finder':
                         )
                 st.session_state['generated_opportunities_raw'] = json.dumps(
                     {
-                        "sources": [
-                            DST_ANNOUNCEMENTS_URL,
-                            ANRF_HOMEPAGE_URL,
-                            OPPORTUNITY_SHEET_URL,
-                            INDIA_SCI_TECH_LATEST_URL,
-                        ],
+                        "sources": [s["url"] for s in grant_sources],
                         "opportunities": ranked,
                     },
                     ensure_ascii=False,
@@ -2566,17 +5487,17 @@ elif st.session_state['current_main_view'] == 'grant_finder':
                 )
                 st.session_state['generated_opportunities'] = ranked
                 st.success("Opportunities generated from Diffrent sources!")
-                if dst_err:
-                    st.warning(f"DST fetch issue (partial results still shown): {dst_err}")
-                if anrf_err:
-                    st.warning(f"ANRF fetch issue (partial results still shown): {anrf_err}")
-                if sheet_err:
-                    st.warning(
-                        "Opportunity Sheet fetch issue (partial results still shown). "
-                        f"To enable it, make the sheet public or publish it to web. Error: {sheet_err}"
-                    )
-                if ist_err:
-                    st.warning(f"IndiaScienceAndTechnology fetch issue (partial results still shown): {ist_err}")
+                source_types = {s["name"]: s["type"] for s in grant_sources}
+                for name, result in source_results.items():
+                    if result["error"] is None:
+                        continue
+                    if source_types.get(name) == "csv_sheet":
+                        st.warning(
+                            f"{name} fetch issue (partial results still shown). "
+                            f"To enable it, make the sheet public or publish it to web. Error: {result['error']}"
+                        )
+                    else:
+                        st.warning(f"{name} fetch issue (partial results still shown): {result['error']}")
             else:
                 # Fallback: keep the app usable even if DST fetch fails (e.g., offline)
                 st.warning("DST/ANRF opportunities unavailable right now. Falling back to AI-generated ideas (may be fictional).")
@@ -2595,7 +5516,7 @@ Return ONLY valid JSON (no markdown, no code fences) with this exact shape:
 }}
 """
                 with st.spinner("AI is brainstorming opportunities..."):
-                    response = generate_content_with_retry(SELECTED_MODEL, prompt)
+                    response = generate_for_task("opportunity_ideas", prompt)
                 if response and response.text:
                     raw_text = response.text.strip()
                     st.session_state['generated_opportunities_raw'] = raw_text
@@ -2646,6 +5567,9 @@ Return ONLY valid JSON (no markdown, no code fences) with this exact shape:
 
                 if st.button(f"Submit this Opportunity ({i+1}) to Grant Proposal Overview Generator", key=f"submit_opp_{i}"):
                     st.info(f"Attempting to submit opportunity: {opportunity_data['scheme_name']}")
+                    if not opportunity_data["full_text_content"] and opp.get("opportunity_key"):
+                        # Store rows are loaded without their full text; fetch it only for the one being saved
+                        opportunity_data["full_text_content"] = load_opportunity_full_text(opp["opportunity_key"])
                     save_generated_opportunity_to_db(opportunity_data)
                     st.success(f"Opportunity '{opportunity_data['scheme_name']}' submitted! Go to 'Grant Proposal  Overview Generator' and click 'Load Last Generated Opportunity'.")
                     st.rerun()
@@ -2847,61 +5771,26 @@ elif st.session_state['current_main_view'] == 'align_research':
             st.session_state['align_user_profile'] = user_research_profile
             st.session_state['align_selected_opportunity'] = selected_opportunity_data
 
-            alignment_prompt = f"""
-            As an expert grant evaluator, critically analyze the alignment between the provided Research Profile and Funding Opportunity.
-
-            Instructions:
-            1. Summarize the core expertise and contributions of the research profile (based only on the provided information, assume publications are implicitly part of 'Research Profile' text if not explicitly separated).
-            2. Map this expertise to the funding call's stated priorities, explicitly distinguishing between:
-               - Direct alignment (clear fit with call objectives)
-               - Indirect or speculative alignment (possible applications if reframed)
-               - Non-alignment (areas with no overlap)
-            3. Highlight major gaps that reduce alignment (e.g., domain mismatch, lack of collaborations, lack of translational/clinical orientation).
-            4. Suggest strategies to increase alignment (e.g., reframing expertise, building collaborations, translational roadmaps).
-            5. Assign a critical **Alignment Score (0–10)**, where:
-               - 0–3 = Very weak/no alignment
-               - 4–6 = Moderate alignment (requires strong reframing)
-               - 7–8 = Strong alignment (with clear fit and collaborations)
-               - 9–10 = Excellent alignment (highly competitive)
-            6. Maintain a professional, analytical tone.
-
-            --- Output Structure ---
-            Research Profile Summary:
-            [Summary of core expertise and contributions]
-
-            Alignment with Call Priorities:
-            - Direct Alignment: [Points of direct fit]
-            - Indirect/Speculative Alignment: [Possible applications if reframed]
-            - Non-Alignment: [Areas with no overlap]
-
-            Key Gaps:
-            [Major gaps reducing alignment]
-
-            Strategic Recommendations:
-            [Strategies to increase alignment]
-
-            Alignment Score: X.X/10
-            ---
-
-            Research Profile:
-            {user_research_profile}
-
-            Funding Opportunity:
-            Scheme Name: {selected_opportunity_data['scheme_name']}
-            Funding Agency: {selected_opportunity_data['funding_agency']}
-            Description: {selected_opportunity_data['description']}
-            """
-
-            # Truncate prompt to avoid exceeding token limits
-            max_prompt_length = 25000  # Adjust as needed based on model limits
-            if len(alignment_prompt) > max_prompt_length:
-                st.warning(f"Alignment prompt truncated from {len(alignment_prompt)} to {max_prompt_length} characters.")
-                alignment_prompt = alignment_prompt[:max_prompt_length]
+            # Fit the profile and call description into the model's token budget (summarize only on overflow)
+            fitted_parts = fit_prompt_parts(
+                {
+                    "profile": user_research_profile,
+                    "description": selected_opportunity_data.get('description', ''),
+                },
+                fixed_text=build_alignment_prompt("", {**selected_opportunity_data, "description": ""}),
+                reserve_output_tokens=get_task_profile("alignment")["max_tokens"],
+            )
+            alignment_prompt = build_alignment_prompt(
+                fitted_parts["profile"],
+                {**selected_opportunity_data, "description": fitted_parts["description"]},
+            )
 
             st.write(f"DEBUG: Alignment prompt length: {len(alignment_prompt)}") # For debugging
 
             with st.spinner("Generating alignment analysis report..."):
-                alignment_response = generate_content_with_retry(SELECTED_MODEL, alignment_prompt)
+                alignment_stream_placeholder = st.empty()
+                alignment_response = stream_for_task("alignment", alignment_prompt, placeholder=alignment_stream_placeholder)
+                alignment_stream_placeholder.empty()
                 if alignment_response:
                     st.session_state['alignment_analysis_report'] = alignment_response.text
                     st.success("Alignment analysis generated successfully!")
@@ -3087,11 +5976,8 @@ elif st.session_state['current_main_view'] == 'brainstorm_room':
     full_proposal_draft = st.session_state.get('full_proposal_draft', '')
     actual_template_sections_used = st.session_state.get('actual_template_sections_used', '')
     
-    MAX_TEXT_LENGTH_FOR_PROMPT = 4000 # Max characters for summary before sending to AI
-
-    # Summarize lengthy inputs to avoid exceeding token limits
-    summarized_user_research_profile = summarize_text_for_prompt(user_research_profile, max_length=MAX_TEXT_LENGTH_FOR_PROMPT)
-    summarized_full_proposal_draft = summarize_text_for_prompt(full_proposal_draft, max_length=MAX_TEXT_LENGTH_FOR_PROMPT)
+    # Lengthy inputs are summarized lazily inside "Generate Brainstorm Analysis" (and memoized across sessions),
+    # so interacting with this page does not trigger any AI calls.
 
     st.write(f"DEBUG: user_research_profile: {bool(user_research_profile)}")
     st.write(f"DEBUG: funding_agency: {bool(funding_agency)}")
@@ -3119,67 +6005,60 @@ elif st.session_state['current_main_view'] == 'brainstorm_room':
         index=0,
         key="br_analysis_mode"
     )
+    if analysis_mode == "Per-section (advanced)":
+        st.slider(
+            "Max parallel AI calls",
+            min_value=1,
+            max_value=12,
+            value=LLM_MAX_CONCURRENCY,
+            key="br_max_parallel",
+            help="Sections are summarized and analyzed concurrently, up to this many at a time.",
+        )
+        st.checkbox(
+            "Re-analyze all sections",
+            value=False,
+            key="br_force_full_reanalysis",
+            help="By default only sections whose content or call context changed since the last run are sent to the AI.",
+        )
 
     if st.button("Generate Brainstorm Analysis", key="generate_brainstorm_btn"):
         
         if user_research_profile and funding_agency and scheme_type and full_proposal_draft and actual_template_sections_used:
+            funding_call_br = {
+                "funding_agency": funding_agency,
+                "scheme_type": scheme_type,
+                "thrust_areas": thrust_areas,
+                "eligibility": eligibility,
+            }
             if analysis_mode == "Single-pass (recommended)":
                 # Show progress for preparation steps
                 prep_progress = st.progress(0, text="Preparing data for analysis...")
                 
-                # Summarize user profile
-                prep_progress.progress(33, text="Summarizing researcher profile to fit AI context window...")
-                summarized_user_research_profile = summarize_text_for_prompt(user_research_profile, max_length=MAX_TEXT_LENGTH_FOR_PROMPT)
-                
-                # Summarize proposal
-                prep_progress.progress(66, text="Summarizing proposal draft to fit AI context window...")
-                summarized_full_proposal_draft = summarize_text_for_prompt(full_proposal_draft, max_length=MAX_TEXT_LENGTH_FOR_PROMPT)
-                
-                # Parse template sections
-                prep_progress.progress(100, text="Preparation complete! Building analysis prompt...")
                 template_section_titles = [line.strip() for line in actual_template_sections_used.split('\n') if line.strip()]
-                template_sections_bullets = "\n".join(f"- {t}" for t in template_section_titles)
-
-                single_pass_prompt = f"""
-                You are a critical grant evaluator. Analyze the following research proposal draft against the funding call and researcher profile.
-
-                --- Researcher Profile ---
-                {summarized_user_research_profile}
-
-                --- Funding Call Details ---
-                Funding Agency: {funding_agency}
-                Scheme Type: {scheme_type}
-                Thrust Areas: {thrust_areas}
-                Eligibility: {eligibility}
-
-                --- Proposal Draft (summarized) ---
-                {summarized_full_proposal_draft}
-
-                --- Template Sections ---
-                {template_sections_bullets}
-
-                For EACH template section, output the following structure exactly:
-                ### [Section Title]
-                **Strengths**
-                - ...
-                - ...
-                **Weaknesses**
-                - ...
-                - ...
-                **Recommendations**
-                - ...
-                - ...
 
-                Notes:
-                - If the section content is missing or vague, state that clearly and recommend precise content to add.
-                - Be specific and actionable. Avoid generic advice.
-                """
+                # Summarize profile/proposal only if they overflow their share of the token budget
+                prep_progress.progress(50, text="Fitting researcher profile and proposal draft into the AI context window...")
+                fitted_parts = fit_prompt_parts(
+                    {"profile": user_research_profile, "draft": full_proposal_draft},
+                    fixed_text=build_single_pass_brainstorm_prompt("", funding_call_br, "", template_section_titles),
+                    reserve_output_tokens=get_task_profile("brainstorm_report")["max_tokens"],
+                )
+                
+                prep_progress.progress(100, text="Preparation complete! Building analysis prompt...")
+                single_pass_prompt = build_single_pass_brainstorm_prompt(
+                    fitted_parts["profile"], funding_call_br, fitted_parts["draft"], template_section_titles
+                )
 
                 prep_progress.empty()  # Clear preparation progress bar
                 with st.spinner("Generating brainstorm analysis (single-pass)..."):
-                    single_resp = generate_content_with_retry(SELECTED_MODEL, single_pass_prompt)
+                    single_stream_placeholder = st.empty()
+                    single_resp = stream_for_task("brainstorm_report", single_pass_prompt, placeholder=single_stream_placeholder)
+                # The report is rendered from session state below; drop the streamed copy so it isn't shown twice
+                single_stream_placeholder.empty()
                 if single_resp and single_resp.text:
                     st.session_state['brainstorm_analysis_report'] = single_resp.text
+                    st.session_state.pop('brainstorm_prompt_cache_caption', None)
+                    st.session_state.pop('brainstorm_reuse_caption', None)
                     st.success("Brainstorm analysis generated!")
                     st.rerun()
                 else:
@@ -3192,70 +6071,99 @@ elif st.session_state['current_main_view'] == 'brainstorm_room':
                 # Split proposal into sections
                 prep_progress.progress(25, text="Splitting proposal into sections...")
                 proposal_sections_content = split_proposal_into_sections(full_proposal_draft, actual_template_sections_used)
-                all_section_reports = []
 
-                # Summarize user profile once for all sections
-                prep_progress.progress(50, text="Summarizing researcher profile to fit AI context window...")
-                summarized_user_research_profile = summarize_text_for_prompt(user_research_profile, max_length=MAX_TEXT_LENGTH_FOR_PROMPT)
-                
-                prep_progress.progress(75, text="Parsing template sections...")
+                prep_progress.progress(40, text="Parsing template sections...")
                 template_section_titles = [line.strip() for line in actual_template_sections_used.split('\n') if line.strip()]
 
+                # Share the token budget between the profile and the largest section; summarize profile once for all sections
+                prep_progress.progress(50, text="Summarizing researcher profile to fit AI context window...")
+                section_budgets = allocate_token_budget(
+                    {
+                        "profile": count_tokens(user_research_profile),
+                        "section": max((count_tokens(c) for c in proposal_sections_content.values()), default=0),
+                    },
+                    prompt_token_budget(
+                        fixed_text=build_section_brainstorm_prefix("", funding_call_br)
+                        + build_section_brainstorm_suffix(max(template_section_titles, key=len, default=""), ""),
+                        reserve_output_tokens=get_task_profile("brainstorm_section")["max_tokens"],
+                    ),
+                )
+                summarized_user_research_profile = summarize_text_for_prompt(user_research_profile, max_tokens=section_budgets["profile"])
+                section_prompt_prefix = build_section_brainstorm_prefix(summarized_user_research_profile, funding_call_br)
+                section_context_hash = hashlib.sha256(section_prompt_prefix.encode("utf-8")).hexdigest()
+                force_full_reanalysis = st.session_state.get('br_force_full_reanalysis', False)
+                sections_reused = [0]
+                section_responses = []  # Upstream responses of this run, for the prompt-cache caption
+
                 prep_progress.progress(100, text="Preparation complete! Starting section-by-section analysis...")
                 prep_progress.empty()  # Clear preparation progress bar
                 
                 total_sections = len(template_section_titles)
-                progress_text = "Generating brainstorm analysis... Please wait."
-                my_bar = st.progress(0, text=progress_text)
-                
-                for i, section_title_from_template in enumerate(template_section_titles):
+                max_in_flight = st.session_state.get('br_max_parallel', LLM_MAX_CONCURRENCY)
+                my_bar = st.progress(0, text=f"Analyzing {total_sections} sections (up to {max_in_flight} in parallel)... Please wait.")
+
+                def analyze_section(section_title_from_template):
+                    # Returns (report, reused); reuse is counted on the calling thread in on_section_done
                     section_content = proposal_sections_content.get(section_title_from_template, "").strip()
-                    
-                    # Show summarization progress for each section
-                    my_bar.progress(
-                        int((i / total_sections) * 100), 
-                        text=f"Summarizing section '{section_title_from_template}' to fit AI context window..."
+                    over_budget = count_tokens(section_content) > section_budgets["section"]
+                    analysis_key, content_hash = section_analysis_key(
+                        section_title_from_template, section_content, section_context_hash,
+                        get_task_profile("brainstorm_section")["model"],
+                        summary_budget=section_budgets["section"] if over_budget else None,
+                    )
+                    if not force_full_reanalysis:
+                        stored_analysis = get_section_analysis(analysis_key)
+                        if stored_analysis is not None:
+                            return stored_analysis, True
+
+                    summarized_section_content = summarize_text_for_prompt(section_content, max_tokens=section_budgets["section"])
+                    section_brainstorm_prompt = section_prompt_prefix + build_section_brainstorm_suffix(
+                        section_title_from_template, summarized_section_content
                     )
-                    summarized_section_content = summarize_text_for_prompt(section_content, max_length=MAX_TEXT_LENGTH_FOR_PROMPT)
-
-                    percent_complete = int(((i + 1) / total_sections) * 100)
-                    my_bar.progress(percent_complete, text=f"Analyzing section: {section_title_from_template} ({percent_complete}% complete)")
-
-                    section_brainstorm_prompt = f"""
-                    --- Researcher Profile ---
-                    {summarized_user_research_profile}
-
-                    --- Funding Call Details ---
-                    Funding Agency: {funding_agency}
-                    Scheme Type: {scheme_type}
-                    Thrust Areas: {thrust_areas}
-                    Eligibility: {eligibility}
-
-                    --- Specific Proposal Section for Analysis ---
-                    Section Title: {section_title_from_template}
-                    Section Content:
-                    {summarized_section_content}
-
-                    --- Instructions for AI ---
-                    For the "{section_title_from_template}" section, provide a **highly critical and actionable** analysis. Focus on the following:
-                    **{section_title_from_template}**
-                    **Strengths**
-                    - 2-3 strengths linked to call priorities or researcher's contributions
-                    **Weaknesses**
-                    - 2-3 critical weaknesses or gaps
-                    **Recommendations**
-                    - 2-3 specific actions to fix weaknesses and improve competitiveness
-                    If the section content is empty or vague, say so and list exact content to add.
-                    """
-
-                    section_response = generate_content_with_retry(SELECTED_MODEL, section_brainstorm_prompt)
+
+                    section_response = generate_for_task("brainstorm_section", section_brainstorm_prompt, use_cache=not force_full_reanalysis)
+                    section_responses.append(section_response)
                     if section_response and section_response.text:
-                        all_section_reports.append(f"### {section_title_from_template}\n{section_response.text}")
-                    else:
-                        all_section_reports.append(f"### {section_title_from_template}\n*Failed to generate analysis for this section.*")
+                        section_report = f"### {section_title_from_template}\n{section_response.text}"
+                        if section_response.finish_reason == "length":
+                            # Cut off at the task's max_tokens: shown this once, never stored for reuse
+                            return section_report + "\n\n*(This analysis reached the length limit and may be incomplete.)*", False
+                        store_section_analysis(
+                            analysis_key, section_title_from_template, content_hash, section_context_hash, section_report,
+                            get_task_profile("brainstorm_section")["model"],
+                        )
+                        return section_report, False
+                    return None, False
+
+                sections_done = [0]
+
+                def on_section_done(idx, result):
+                    sections_done[0] += 1
+                    if result and result[1]:
+                        sections_reused[0] += 1
+                    percent_complete = int((sections_done[0] / total_sections) * 100)
+                    my_bar.progress(percent_complete, text=f"Analyzed section: {template_section_titles[idx]} ({sections_done[0]}/{total_sections})")
+
+                # Fan out summaries + analyses; results come back in template order
+                section_reports = run_concurrently(
+                    analyze_section,
+                    template_section_titles,
+                    max_workers=max_in_flight,
+                    on_complete=on_section_done,
+                    warm_first=True,
+                )
+                all_section_reports = [
+                    (result and result[0]) or f"### {title}\n*Failed to generate analysis for this section.*"
+                    for title, result in zip(template_section_titles, section_reports)
+                ]
 
                 st.session_state['brainstorm_analysis_report'] = "\n\n---\n\n".join(all_section_reports)
+                st.session_state['brainstorm_prompt_cache_caption'] = format_prompt_cache_caption(section_responses)
                 my_bar.progress(100, text="Brainstorm analysis complete!")
+                st.session_state['brainstorm_reuse_caption'] = (
+                    f"{total_sections - sections_reused[0]} section(s) analyzed, "
+                    f"{sections_reused[0]} unchanged section(s) reused from earlier runs."
+                )
                 st.success("Brainstorm analysis generated!")
                 st.rerun()
         else:
@@ -3267,6 +6175,10 @@ elif st.session_state['current_main_view'] == 'brainstorm_room':
     if 'brainstorm_analysis_report' in st.session_state:
         st.subheader("Brainstorm Analysis Report:")
         st.write(st.session_state['brainstorm_analysis_report'])
+        if st.session_state.get('brainstorm_reuse_caption'):
+            st.caption(st.session_state['brainstorm_reuse_caption'])
+        if st.session_state.get('brainstorm_prompt_cache_caption'):
+            st.caption(st.session_state['brainstorm_prompt_cache_caption'])
         st.download_button(
             label="Download Brainstorm Report",
             data=st.session_state['brainstorm_analysis_report'].encode('utf-8'),
@@ -3358,6 +6270,14 @@ elif st.session_state['current_main_view'] == 'draft_final':
                     index=1,
                     key="improvement_approach"
                 )
+                st.slider(
+                    "Sections to improve in parallel",
+                    min_value=1,
+                    max_value=12,
+                    value=LLM_MAX_CONCURRENCY,
+                    key="draft_final_max_parallel",
+                    help="Each section is improved independently, so several can be generated at once.",
+                )
                 
                 if st.button("🚀 Generate Improved Final Proposal", key="generate_final_btn"):
                     # Extract data (handle None values from database)
@@ -3373,9 +6293,6 @@ elif st.session_state['current_main_view'] == 'draft_final':
                     if not all([original_proposal, brainstorm_report, template_sections]):
                         st.error("Missing required data. Please ensure the proposal has all necessary information.")
                     else:
-                        # Define max text length for prompt
-                        MAX_TEXT_LENGTH_FOR_PROMPT = 4000  # Max characters for summary before sending to AI
-                        
                         # Show progress
                         progress_bar = st.progress(0, text="Preparing to generate improved proposal...")
                         
@@ -3387,11 +6304,6 @@ elif st.session_state['current_main_view'] == 'draft_final':
                         progress_bar.progress(20, text="Extracting original sections...")
                         original_sections = split_proposal_into_sections(original_proposal, template_sections)
                         
-                        # Summarize inputs
-                        progress_bar.progress(30, text="Summarizing brainstorming feedback...")
-                        summarized_brainstorm = summarize_text_for_prompt(brainstorm_report, max_length=MAX_TEXT_LENGTH_FOR_PROMPT)
-                        summarized_user_profile = summarize_text_for_prompt(user_profile, max_length=MAX_TEXT_LENGTH_FOR_PROMPT)
-                        
                         # Set improvement level instructions
                         if improvement_approach == "Conservative (minor edits)":
                             improvement_instruction = "Make minimal, targeted improvements. Keep the original structure and most content. Only address critical weaknesses."
@@ -3400,79 +6312,83 @@ elif st.session_state['current_main_view'] == 'draft_final':
                         else:  # Aggressive
                             improvement_instruction = "Significantly rewrite sections to maximize impact. Address all weaknesses comprehensively and elevate the entire proposal quality."
                         
+                        funding_call_df = {
+                            "funding_agency": funding_agency,
+                            "scheme_type": scheme_type,
+                            "thrust_areas": thrust_areas,
+                            "eligibility": eligibility,
+                        }
+
+                        # Summarize inputs
+                        progress_bar.progress(30, text="Summarizing brainstorming feedback...")
+                        # Original section content is sent verbatim, so budget for the largest one and fit the rest around it
+                        draft_budgets = allocate_token_budget(
+                            {
+                                "brainstorm": count_tokens(brainstorm_report),
+                                "profile": count_tokens(user_profile),
+                                "section": max((count_tokens(c) for c in original_sections.values()), default=0),
+                            },
+                            prompt_token_budget(
+                                fixed_text=build_section_improvement_prefix(funding_call_df, "", "", improvement_instruction)
+                                + build_section_improvement_suffix(max(template_section_titles, key=len, default=""), ""),
+                                reserve_output_tokens=get_task_profile("improve_section")["max_tokens"],
+                            ),
+                        )
+                        summarized_brainstorm = summarize_text_for_prompt(brainstorm_report, max_tokens=draft_budgets["brainstorm"])
+                        summarized_user_profile = summarize_text_for_prompt(user_profile, max_tokens=draft_budgets["profile"])
+                        
+                        improvement_prompt_prefix = build_section_improvement_prefix(
+                            funding_call_df, summarized_user_profile, summarized_brainstorm, improvement_instruction
+                        )
+                        
                         # Generate improved sections
                         improved_sections = {}
                         total_sections = len(template_section_titles)
+                        max_workers = st.session_state.get('draft_final_max_parallel', LLM_MAX_CONCURRENCY)
+                        improvement_responses = []  # Upstream responses of this run, for the prompt-cache caption
                         
-                        for i, section_title in enumerate(template_section_titles):
-                            percent = int(30 + (i / total_sections) * 60)  # 30% to 90%
-                            progress_bar.progress(
-                                percent, 
-                                text=f"Improving section '{section_title}' ({i+1}/{total_sections})..."
-                            )
-                            
+                        def improve_section(section_title):
                             original_section_content = original_sections.get(section_title, "").strip()
                             
-                            # Build improvement prompt
-                            improvement_prompt = f"""
-You are an expert grant proposal writer. Your task is to improve the following proposal section based on brainstorming feedback.
-
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-CONTEXT
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-Funding Agency: {funding_agency}
-Scheme Type: {scheme_type}
-Thrust Areas: {thrust_areas}
-Eligibility: {eligibility}
-
-Researcher Profile (Summarized):
-{summarized_user_profile}
-
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-SECTION TO IMPROVE: "{section_title}"
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-ORIGINAL CONTENT:
-{original_section_content if original_section_content else "[SECTION IS EMPTY OR MISSING]"}
-
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-BRAINSTORMING FEEDBACK (Full Report):
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-{summarized_brainstorm}
-
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-IMPROVEMENT INSTRUCTIONS
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-Improvement Level: {improvement_instruction}
-
-Your task:
-1. Carefully review the original "{section_title}" section
-2. Identify relevant weaknesses and recommendations from the brainstorming report for THIS section
-3. Generate an IMPROVED version that:
-   - Addresses all identified weaknesses
-   - Implements the recommendations
-   - Maintains alignment with funding agency priorities
-   - Preserves the researcher's voice and authentic expertise
-   - Uses clear, compelling, professional language
-   - Includes specific details, metrics, and evidence where possible
-
-CRITICAL RULES:
-- Write ONLY the improved section content (no meta-commentary)
-- Do NOT include section headers or labels
-- Do NOT write "Here is the improved section" or similar phrases
-- If the original section was empty, create comprehensive content based on recommendations
-- Maintain appropriate length for this section type
-- Ensure coherence with other proposal sections
-
-OUTPUT: Write the improved section content directly below:
-"""
+                            improvement_prompt = improvement_prompt_prefix + build_section_improvement_suffix(
+                                section_title, original_section_content
+                            )
                             
                             # Generate improved content
-                            response = generate_content_with_retry(SELECTED_MODEL, improvement_prompt)
+                            response = generate_for_task("improve_section", improvement_prompt)
+                            improvement_responses.append(response)
                             
+                            if response and response.text and response.finish_reason == "length":
+                                # Cut off at the task's max_tokens; a truncated rewrite is worse than the original
+                                return f"[Improved text exceeded the length limit. Original content retained.]\n\n{original_section_content}"
                             if response and response.text:
-                                improved_sections[section_title] = response.text.strip()
-                            else:
-                                improved_sections[section_title] = f"[Failed to improve this section. Original content retained.]\n\n{original_section_content}"
+                                return response.text.strip()
+                            return f"[Failed to improve this section. Original content retained.]\n\n{original_section_content}"
+
+                        sections_done = [0]
+
+                        def on_section_improved(idx, _content):
+                            # Reported in completion order; percent runs from 30% to 90%
+                            sections_done[0] += 1
+                            percent = int(30 + (sections_done[0] / total_sections) * 60)
+                            progress_bar.progress(
+                                percent,
+                                text=f"Improved section '{template_section_titles[idx]}' ({sections_done[0]}/{total_sections})..."
+                            )
+
+                        progress_bar.progress(30, text=f"Improving {total_sections} sections (up to {max_workers} in parallel)...")
+                        improved_contents = run_concurrently(
+                            improve_section,
+                            template_section_titles,
+                            max_workers=max_workers,
+                            on_complete=on_section_improved,
+                            warm_first=True,
+                        )
+                        for section_title, content in zip(template_section_titles, improved_contents):
+                            if content is None:
+                                # improve_section raised; keep the user's text rather than losing the section
+                                content = f"[Failed to improve this section. Original content retained.]\n\n{original_sections.get(section_title, '').strip()}"
+                            improved_sections[section_title] = content
                         
                         # Combine improved sections
                         progress_bar.progress(95, text="Assembling final proposal...")
@@ -3491,7 +6407,8 @@ OUTPUT: Write the improved section content directly below:
                             'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
                             'approach': improvement_approach,
                             'funding_agency': funding_agency,
-                            'scheme_type': scheme_type
+                            'scheme_type': scheme_type,
+                            'prompt_cache_caption': format_prompt_cache_caption(improvement_responses),
                         }
                         
                         progress_bar.progress(100, text="Improved proposal generated successfully!")
@@ -3508,6 +6425,8 @@ OUTPUT: Write the improved section content directly below:
                     if 'improvement_metadata' in st.session_state:
                         metadata = st.session_state['improvement_metadata']
                         st.info(f"Generated: {metadata['timestamp']} | Approach: {metadata['approach']}")
+                        if metadata.get('prompt_cache_caption'):
+                            st.caption(metadata['prompt_cache_caption'])
                     
                     # Tabs for comparison
                     tab1, tab2, tab3 = st.tabs(["✨ Improved Proposal", "📊 Side-by-Side", "📄 Original"])
@@ -3656,3 +6575,179 @@ elif st.session_state['current_main_view'] == 'my_drafts':
 
 elif st.session_state['current_main_view'] == 'export_share':
     st.header("📤 Export & Share Center")
+
+elif st.session_state['current_main_view'] == 'admin':
+    st.header("🛠️ Admin Console")
+
+    # --- LLM Telemetry ---
+    st.subheader("LLM Call Telemetry")
+    backend_note = f"Active LLM backend: `{get_llm_backend().name}`"
+    if LLM_BACKEND == "mock":
+        backend_note += f" (profile `{LLM_MOCK_PROFILE}`)"
+    elif LLM_BACKEND in ("record", "replay"):
+        backend_note += f" (recordings: `{LLM_RECORDINGS_FILE.name}`)"
+    st.caption(backend_note + ". Set LLM_BACKEND to openai, mock, record or replay.")
+    breaker = get_llm_circuit_breaker()
+    breaker_note = f"Circuit breaker: **{breaker.state()}**"
+    if breaker.state() != "closed":
+        breaker_note += f" (next probe in {breaker.retry_in():.0f}s)"
+    hedge_delays = []
+    tracker = get_llm_latency_tracker()
+    for model_name, feature_name in sorted(tracker.keys()):
+        hedge_delay = tracker.hedge_delay((model_name, feature_name))
+        if hedge_delay is not None:
+            hedge_delays.append(f"{feature_name}: {hedge_delay:.1f}s")
+    if not LLM_HEDGE_ENABLED:
+        breaker_note += " · Hedging disabled"
+    elif hedge_delays:
+        breaker_note += " · Hedge after " + ", ".join(hedge_delays)
+    else:
+        breaker_note += f" · Hedging starts after {LLM_HEDGE_MIN_SAMPLES} calls per feature"
+    st.markdown(breaker_note)
+    with st.expander("Task generation profiles"):
+        st.dataframe(
+            [{"task": task, **get_task_profile(task)} for task in LLM_TASK_PROFILES],
+            use_container_width=True,
+        )
+        st.caption("Override with LLM_FAST_MODEL or LLM_TASK_<TASK>_<MODEL|MAX_TOKENS|TEMPERATURE> environment variables.")
+    telemetry_windows = {"Last 24 hours": 1, "Last 7 days": 7, "Last 30 days": 30, "All time": None}
+    telemetry_window = st.selectbox("Time window", list(telemetry_windows.keys()), index=1, key="admin_telemetry_window")
+    window_days = telemetry_windows[telemetry_window]
+    ledger_rows = load_llm_ledger(time.time() - window_days * 86400 if window_days else 0.0)
+    if ledger_rows:
+        ledger_summary = summarize_llm_ledger(ledger_rows)
+        col_calls, col_hits, col_tokens, col_cost = st.columns(4)
+        with col_calls:
+            st.metric("LLM calls", len(ledger_rows))
+        with col_hits:
+            st.metric("Cache hit rate", f"{sum(1 for r in ledger_rows if r['cache_hit']) / len(ledger_rows):.0%}")
+        with col_tokens:
+            st.metric("Tokens", f"{sum((r['prompt_tokens'] or 0) + (r['completion_tokens'] or 0) for r in ledger_rows):,}")
+        with col_cost:
+            st.metric("Est. cost (USD)", f"{sum(row['est_cost_usd'] for row in ledger_summary):.2f}")
+        st.markdown("**Per feature** (latency percentiles exclude cache hits and coalesced duplicates)")
+        st.dataframe(ledger_summary, use_container_width=True)
+
+        col_csv_summary, col_csv_raw = st.columns(2)
+        with col_csv_summary:
+            st.download_button(
+                label="Download per-feature summary (CSV)",
+                data=_rows_to_csv(ledger_summary).encode("utf-8"),
+                file_name="llm_telemetry_summary.csv",
+                mime="text/csv",
+            )
+        with col_csv_raw:
+            st.download_button(
+                label="Download raw call ledger (CSV)",
+                data=_rows_to_csv(ledger_rows).encode("utf-8"),
+                file_name="llm_call_ledger.csv",
+                mime="text/csv",
+            )
+    else:
+        st.info("No LLM calls recorded in this window.")
+
+    st.markdown("---")
+
+    # --- Opportunity Sources ---
+    st.subheader("Opportunity Sources")
+    source_state = load_source_fetch_state()
+    source_rows = []
+    for source in load_grant_sources(include_disabled=True):
+        fetch_state = source_state.get(source["name"]) or {}
+        source_rows.append(
+            {
+                "Source": source["name"],
+                "Type": source["type"],
+                "Enabled": source["enabled"],
+                "URL": source["url"],
+                "Refresh (h)": round(source["refresh_interval_s"] / 3600, 1),
+                "Max concurrency": source["max_concurrency"],
+                "Timeout (s)": source["timeout_s"],
+                "Last crawl": datetime.fromtimestamp(fetch_state["last_attempt_at"]).strftime("%Y-%m-%d %H:%M") if fetch_state else "never",
+                "Items": fetch_state.get("items"),
+                "Last error": fetch_state.get("last_error") or "",
+            }
+        )
+    st.dataframe(source_rows, use_container_width=True)
+    st.caption(f"Add or override sources in `{_find_config_file('sources.json', 'SOURCES_PATH')}` (types: {', '.join(GRANT_SOURCE_FETCHERS)}).")
+
+    st.markdown("---")
+
+    # --- Batch Jobs ---
+    st.subheader("Batch Jobs")
+    st.write("Run bulk, non-interactive AI workloads through a batch backend instead of one call at a time. Results are written back to the database when a job completes.")
+
+    batch_kind_label = st.radio(
+        "Workload",
+        ("Brainstorm analysis for every saved proposal", "Align a research profile with every saved opportunity"),
+        key="admin_batch_kind",
+    )
+    batch_backend_label = st.radio(
+        "Backend",
+        ("OpenAI Batch API", "Local stand-in (offline)"),
+        key="admin_batch_backend",
+        help="The local stand-in answers requests deterministically without network access, for testing the pipeline.",
+    )
+    batch_backend_name = "openai" if batch_backend_label == "OpenAI Batch API" else "local"
+
+    batch_profile_text = ""
+    if batch_kind_label.startswith("Align"):
+        saved_profiles = load_user_profiles()
+        profile_choices = ["Current session profile"] + list(saved_profiles.keys())
+        chosen_profile = st.selectbox("Research profile", profile_choices, key="admin_batch_profile")
+        if chosen_profile == "Current session profile":
+            batch_profile_text = st.session_state.get('user_research_profile', '')
+        else:
+            batch_profile_text = saved_profiles.get(chosen_profile, '')
+
+    if st.button("Submit Batch", key="admin_batch_submit"):
+        if batch_kind_label.startswith("Brainstorm"):
+            batch_kind = "brainstorm"
+            batch_requests = build_brainstorm_batch_requests(load_all_proposals())
+        else:
+            batch_kind = "alignment"
+            with sqlite3.connect(DATABASE_FILE) as conn:
+                conn.row_factory = sqlite3.Row
+                saved_opportunities = [dict(row) for row in conn.execute("SELECT id, scheme_name, funding_agency, description FROM generated_opportunities")]
+            batch_requests = build_alignment_batch_requests(batch_profile_text, saved_opportunities) if batch_profile_text else []
+            if not batch_profile_text:
+                st.warning("Please provide a research profile first.")
+
+        if batch_requests:
+            try:
+                job_id = submit_batch_job(batch_kind, batch_requests, batch_backend_name)
+                st.success(f"Submitted batch job #{job_id} with {len(batch_requests)} requests.")
+            except Exception as e:
+                st.error(f"Failed to submit batch: {e}")
+                traceback.print_exc()
+        else:
+            st.info("Nothing to submit for this workload.")
+
+    batch_jobs = load_batch_jobs()
+    if batch_jobs:
+        if st.button("Poll Pending Jobs", key="admin_batch_poll"):
+            for job in batch_jobs:
+                if job['status'] not in BATCH_TERMINAL_STATUSES:
+                    try:
+                        poll_batch_job(job)
+                    except Exception as e:
+                        st.error(f"Failed to poll job #{job['id']}: {e}")
+            st.rerun()
+        st.dataframe(
+            [
+                {
+                    "Job": job['id'],
+                    "Created": job['created_at'],
+                    "Workload": job['kind'],
+                    "Backend": job['backend'],
+                    "Status": job['status'],
+                    "Requests": job['request_count'],
+                    "Applied": job['applied_count'],
+                    "Error": job.get('error') or "",
+                }
+                for job in batch_jobs
+            ],
+            use_container_width=True,
+        )
+    else:
+        st.info("No batch jobs yet.")